@@ -10,16 +10,60 @@ import json
 import hashlib
 import logging
 
-from sqlalchemy import String, Float, Integer, TIMESTAMP, create_engine, func, cast, Sequence
+from sqlalchemy import String, Float, Integer, BigInteger, TIMESTAMP, Computed, create_engine, func, cast, text, Sequence
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
-from sqlalchemy.dialects.postgresql import JSONB, TEXT
+from sqlalchemy.dialects.postgresql import JSONB, TEXT, TSVECTOR
 
 from scraper import scrape as run_all_scrapers
+from tracing import set_attributes, traced
+from profiling import profiled
 
 global_foodbank_id = 1
 global_program_id = 1
 global_sponsor_id = 1
 
+# Numeric shadow of the text primary key: ids of up to 18 digits as bigints, every other id at
+# the bigint maximum. The API orders and seeks on (id_num, id) for keyset pagination (numeric
+# ids in numeric order, then the rest by id) with a row-value comparison, which needs both
+# columns NOT NULL to be a single range seek on the composite index.
+ID_NUM_SQL = "CASE WHEN id ~ '^[0-9]+$' AND length(id) <= 18 THEN id::bigint ELSE 9223372036854775807 END"
+
+# Weighted full-text search documents (A = strongest). Postgres keeps them current as stored
+# generated columns backed by GIN indexes; the API ranks matches with ts_rank_cd.
+SEARCH_CONFIG = "english"
+SEARCH_DOCUMENTS: Dict[str, List[Tuple[str, str]]] = {
+    "foodbanks": [
+        ("A", "name"), ("B", "city"), ("B", "urgency"), ("B", "eligibility"), ("B", "services"),
+        ("C", "about"), ("C", "address"), ("C", "zipcode"), ("D", "languages"),
+    ],
+    "programs": [
+        ("A", "name"), ("B", "program_type"), ("B", "host"), ("B", "eligibility"),
+        ("C", "about"), ("C", "frequency"), ("C", "cost"),
+    ],
+    "sponsors": [
+        ("A", "name"), ("B", "affiliation"), ("B", "contribution"), ("B", "city"),
+        ("C", "about"), ("C", "past_involvement"), ("D", "contact"),
+    ],
+}
+JSONB_SEARCH_COLUMNS = {"services", "languages", "contact"}
+
+# Same normalization as normalize_zipcode(), for backfilling rows loaded before zipcode_norm existed.
+ZIPCODE_NORM_SQL = "upper(regexp_replace(zipcode, '[^0-9A-Za-z]', '', 'g'))"
+
+
+def _search_doc_sql(table: str) -> str:
+    """
+    Returns the immutable tsvector expression for a table's search_doc column.
+    """
+    parts = []
+    for weight, col in SEARCH_DOCUMENTS[table]:
+        if col in JSONB_SEARCH_COLUMNS:
+            vec = f"""jsonb_to_tsvector('{SEARCH_CONFIG}', coalesce({col}, '[]'::jsonb), '["string"]')"""
+        else:
+            vec = f"to_tsvector('{SEARCH_CONFIG}', coalesce({col}, ''))"
+        parts.append(f"setweight({vec}, '{weight}')")
+    return " || ".join(parts)
+
 
 class Base(DeclarativeBase):
     """
@@ -34,6 +78,7 @@ class FoodBank(Base):
     __tablename__ = "foodbanks"
 
     id: Mapped[str] = mapped_column(String, primary_key=True, server_default=cast(func.nextval("foodbanks_id_seq"), TEXT))
+    id_num: Mapped[int] = mapped_column(BigInteger, Computed(ID_NUM_SQL, persisted=True), nullable=False)
     name: Mapped[Optional[str]] = mapped_column(String(256))
     about: Mapped[Optional[str]] = mapped_column(String)
     address: Mapped[Optional[str]] = mapped_column(String(256))
@@ -49,8 +94,10 @@ class FoodBank(Base):
     urgency: Mapped[Optional[str]] = mapped_column(String(64))
     website: Mapped[Optional[str]] = mapped_column(String)
     zipcode: Mapped[Optional[str]] = mapped_column(String(16))
+    zipcode_norm: Mapped[Optional[str]] = mapped_column(String(16))           # alphanumerics only, indexed for prefix match
     fetched_at: Mapped[Optional[Any]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     created_at: Mapped[Any] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    search_doc: Mapped[Optional[Any]] = mapped_column(TSVECTOR, Computed(_search_doc_sql("foodbanks"), persisted=True))
 
 
 
@@ -62,6 +109,7 @@ class Program(Base):
     __tablename__ = "programs"
 
     id: Mapped[str] = mapped_column(String, primary_key=True, server_default=cast(func.nextval("programs_id_seq"), TEXT))
+    id_num: Mapped[int] = mapped_column(BigInteger, Computed(ID_NUM_SQL, persisted=True), nullable=False)
     name: Mapped[Optional[str]] = mapped_column(String(256))
     program_type: Mapped[Optional[str]] = mapped_column(String(64))
     eligibility: Mapped[Optional[str]] = mapped_column(String(128))
@@ -75,6 +123,7 @@ class Program(Base):
     links: Mapped[Optional[Any]] = mapped_column(JSONB, nullable=True)           # null or object/array
     fetched_at: Mapped[Optional[Any]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     created_at: Mapped[Any] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    search_doc: Mapped[Optional[Any]] = mapped_column(TSVECTOR, Computed(_search_doc_sql("programs"), persisted=True))
 
 
 class Sponsor(Base):
@@ -84,6 +133,7 @@ class Sponsor(Base):
     __tablename__ = "sponsors"
 
     id: Mapped[str] = mapped_column(String, primary_key=True, server_default=cast(func.nextval("sponsors_id_seq"), TEXT))
+    id_num: Mapped[int] = mapped_column(BigInteger, Computed(ID_NUM_SQL, persisted=True), nullable=False)
     name: Mapped[Optional[str]] = mapped_column(String(256))
     image: Mapped[Optional[str]] = mapped_column(String)
     alt: Mapped[Optional[str]] = mapped_column(String(256))
@@ -100,6 +150,31 @@ class Sponsor(Base):
     ein: Mapped[Optional[str]] = mapped_column(String(256))
     fetched_at: Mapped[Optional[Any]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     created_at: Mapped[Any] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    search_doc: Mapped[Optional[Any]] = mapped_column(TSVECTOR, Computed(_search_doc_sql("sponsors"), persisted=True))
+
+
+class DataVersion(Base):
+    """
+    Single-row load counter. Bumped after every successful load so API caches can invalidate.
+    """
+    __tablename__ = "data_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    loaded_at: Mapped[Any] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class FacetCount(Base):
+    """
+    Value counts for the API's filter dropdowns (/v1/<resource>/facets), rebuilt by every load.
+    The primary key lets the unfiltered facet request read one index range.
+    """
+    __tablename__ = "facet_counts"
+
+    resource: Mapped[str] = mapped_column(String(32), primary_key=True)
+    field: Mapped[str] = mapped_column(String(64), primary_key=True)
+    value: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
 
 
 
@@ -130,6 +205,102 @@ def get_engine():
     )
 
 
+# Idempotent per-table DDL; "{table}" is substituted for each model table.
+SCHEMA_DDL: List[str] = [
+    # Older loaders created a nullable id_num (NULL for non-numeric ids); regenerate it as NOT NULL
+    """DO $$ BEGIN
+        IF EXISTS (SELECT 1 FROM information_schema.columns WHERE table_schema = current_schema()
+                   AND table_name = '{table}' AND column_name = 'id_num' AND is_nullable = 'YES') THEN
+            ALTER TABLE {table} DROP COLUMN id_num;
+        END IF;
+    END $$""",
+    f"ALTER TABLE {{table}} ADD COLUMN IF NOT EXISTS id_num BIGINT GENERATED ALWAYS AS ({ID_NUM_SQL}) STORED NOT NULL",
+    # id_num is not unique ("007" and "7" share one); older loaders created it as a unique key
+    "ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_id_num_key",
+    "DROP INDEX IF EXISTS {table}_id_num_key",
+    "CREATE INDEX IF NOT EXISTS {table}_id_num_id_idx ON {table} (id_num, id)",
+    "ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_doc tsvector GENERATED ALWAYS AS ({search_doc}) STORED",
+    "CREATE INDEX IF NOT EXISTS {table}_search_doc_idx ON {table} USING GIN (search_doc)",
+]
+
+# Table-specific DDL backing the API's filter predicates.
+TABLE_DDL: Dict[str, List[str]] = {
+    "foodbanks": [
+        "ALTER TABLE foodbanks ADD COLUMN IF NOT EXISTS zipcode_norm VARCHAR(16)",
+        f"UPDATE foodbanks SET zipcode_norm = {ZIPCODE_NORM_SQL} WHERE zipcode_norm IS NULL AND zipcode IS NOT NULL",
+        "CREATE INDEX IF NOT EXISTS foodbanks_zipcode_norm_idx ON foodbanks (zipcode_norm text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS foodbanks_city_idx ON foodbanks (city)",
+        "CREATE INDEX IF NOT EXISTS foodbanks_state_idx ON foodbanks (state)",
+        "CREATE INDEX IF NOT EXISTS foodbanks_eligibility_idx ON foodbanks (eligibility)",
+        "CREATE INDEX IF NOT EXISTS foodbanks_urgency_idx ON foodbanks (urgency)",
+    ],
+    "programs": [
+        "CREATE INDEX IF NOT EXISTS programs_eligibility_idx ON programs (eligibility)",
+    ],
+    "sponsors": [
+        "CREATE INDEX IF NOT EXISTS sponsors_city_idx ON sponsors (city)",
+        "CREATE INDEX IF NOT EXISTS sponsors_state_idx ON sponsors (state)",
+    ],
+}
+
+# Free-text filter columns the API matches with ILIKE '%val%'; served by pg_trgm GIN indexes.
+TRIGRAM_COLUMNS: Dict[str, List[str]] = {
+    "foodbanks": ["name", "address"],
+    "programs": ["name", "frequency", "cost", "program_type", "host"],
+    "sponsors": ["name", "affiliation", "contribution"],
+}
+
+
+# Facet fields per table and the SQL value each row contributes. zipcode facets on the 5-character
+# prefix of zipcode_norm (what the API's prefix filter matches); JSONB arrays count once per element.
+# The API mirrors this for filtered facet requests, so update both together.
+FACET_COLUMNS: Dict[str, Dict[str, str]] = {
+    "foodbanks": {
+        "city": "city", "eligibility": "eligibility", "urgency": "urgency",
+        "languages": "facet.value", "zipcode": "left(zipcode_norm, 5)",
+    },
+    "programs": {"eligibility": "eligibility", "program_type": "program_type"},
+    "sponsors": {"city": "city", "affiliation": "affiliation"},
+}
+JSONB_FACET_COLUMNS = {"languages"}
+
+
+def _facet_from_sql(table: str, field: str) -> str:
+    """
+    Returns the FROM clause for a facet; JSONB array fields are unnested laterally as facet(value).
+    """
+    if field in JSONB_FACET_COLUMNS:
+        return (f"{table} CROSS JOIN LATERAL jsonb_array_elements_text("
+                f"CASE WHEN jsonb_typeof({field}) = 'array' THEN {field} ELSE '[]'::jsonb END) AS facet(value)")
+    return table
+
+
+def ensure_schema(engine) -> None:
+    """
+    Brings tables created by older loader versions up to date (idempotent DDL).
+    create_all() only creates missing tables, so added columns and indexes live here.
+    Trigram indexes are skipped (with a warning) if pg_trgm cannot be installed.
+    """
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        has_trgm = True
+    except Exception as exc:
+        logging.warning("pg_trgm unavailable; skipping trigram indexes: %s", exc)
+        has_trgm = False
+
+    with engine.begin() as conn:
+        for table in ("foodbanks", "programs", "sponsors"):
+            for stmt in SCHEMA_DDL:
+                conn.execute(text(stmt.format(table=table, search_doc=_search_doc_sql(table))))
+            for stmt in TABLE_DDL.get(table, []):
+                conn.execute(text(stmt))
+            for col in TRIGRAM_COLUMNS.get(table, []) if has_trgm else []:
+                conn.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS {table}_{col}_trgm_idx ON {table} USING GIN ({col} gin_trgm_ops)"
+                ))
+
+
 def get_session(engine) -> Session:
     """
     Returns a new Session bound to engine.
@@ -137,6 +308,7 @@ def get_session(engine) -> Session:
     return Session(engine)
 
 
+@traced("loader.normalize_buckets")
 def normalize_buckets(rows):
     """
     /* Split into (foodbanks, programs, sponsors) without 'type'. */
@@ -155,6 +327,7 @@ def normalize_buckets(rows):
 
 
 
+@traced("loader.dedup_rows")
 def _dedup_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
     Removes exact-duplicate dicts using canonical JSON serialization.
@@ -166,6 +339,7 @@ def _dedup_rows(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             continue
         seen.add(key)
         out.append(r)
+    set_attributes(**{"rows.in": len(rows), "rows.out": len(out)})
     return out
 
 
@@ -222,6 +396,17 @@ def _digits_only(s: object) -> Optional[str]:
     return ss if ss.isdigit() else None
 
 
+def normalize_zipcode(z: object) -> Optional[str]:
+    """
+    Returns the zipcode with separators removed and letters upper-cased ("78701-1234" -> "787011234").
+    Must stay in sync with the API's zipcode filter normalization.
+    """
+    if z is None:
+        return None
+    norm = "".join(ch for ch in str(z) if ch.isalnum()).upper()
+    return norm or None
+
+
 def _map_foodbank(rec: dict) -> dict:
     """
     Project a raw scraper record into FoodBank columns.
@@ -243,6 +428,7 @@ def _map_foodbank(rec: dict) -> dict:
         "urgency": rec.get("urgency"),
         "website": rec.get("website"),
         "zipcode": rec.get("zipcode"),
+        "zipcode_norm": normalize_zipcode(rec.get("zipcode")),
         "fetched_at": rec.get("fetched_at"),
     }
     if rid is not None:
@@ -329,12 +515,52 @@ def truncate_tables(session: Session) -> None:
     session.query(Sponsor).delete()
 
 
+def bump_data_version(session: Session) -> int:
+    """
+    Increments the data version inside the current transaction and returns the new value.
+    """
+    return session.execute(text(
+        """
+        INSERT INTO data_version (id, version, loaded_at) VALUES (1, 1, now())
+        ON CONFLICT (id) DO UPDATE SET version = data_version.version + 1, loaded_at = now()
+        RETURNING version
+        """
+    )).scalar_one()
+
+
+@traced("loader.refresh_facets")
+def refresh_facets(session: Session) -> int:
+    """
+    Rebuilds facet_counts from the freshly loaded tables inside the current transaction.
+    Returns the number of (resource, field, value) rows written.
+    """
+    session.execute(text("DELETE FROM facet_counts"))
+    written = 0
+    for table, fields in FACET_COLUMNS.items():
+        for field, value in fields.items():
+            written += session.execute(text(
+                f"""
+                INSERT INTO facet_counts (resource, field, value, count)
+                SELECT :resource, :field, {value}, count(*)
+                FROM {_facet_from_sql(table, field)}
+                WHERE {value} IS NOT NULL AND {value} <> ''
+                GROUP BY {value}
+                """
+            ), {"resource": table, "field": field}).rowcount
+    set_attributes(rows=written)
+    return written
+
+
+@traced("loader.bulk_insert")
 def bulk_insert(session, model, items, bucket):
     global global_foodbank_id, global_program_id, global_sponsor_id
+    set_attributes(**{"loader.bucket": bucket, "db.table": model.__tablename__, "rows": len(items)})
 
     rows = []
     for r in items:
         r.pop("type", None)  # remove legacy key
+        if bucket == "foodbank" and "zipcode_norm" not in r:
+            r["zipcode_norm"] = normalize_zipcode(r.get("zipcode"))
 
         # Assign global ID as string if missing or invalid
         if "id" not in r or not str(r["id"]).isdigit():
@@ -355,6 +581,8 @@ def bulk_insert(session, model, items, bucket):
     return len(rows)
 
 
+@profiled("loader-run_once")
+@traced("loader.run_once")
 def run_once() -> int:
     """
      Runs scrapers or dummy data, optionally simulates (no DB writes), else writes atomically and exits. 
@@ -396,6 +624,7 @@ def run_once() -> int:
     try:
         engine = get_engine()
         Base.metadata.create_all(engine)
+        ensure_schema(engine)
         with get_session(engine) as s:
             try:
                 if do_truncate:
@@ -403,8 +632,11 @@ def run_once() -> int:
                 n1 = bulk_insert(s, FoodBank, fb, "foodbank")
                 n2 = bulk_insert(s, Program, prg, "program")
                 n3 = bulk_insert(s, Sponsor, spn, "sponsor")
+                facets = refresh_facets(s)
+                version = bump_data_version(s)
                 s.commit()
-                logging.info("Load complete. Inserted: fb=%d prg=%d spn=%d", n1, n2, n3)
+                logging.info("Load complete. Inserted: fb=%d prg=%d spn=%d, %d facet values (data version %d)",
+                             n1, n2, n3, facets, version)
                 return 0
             except Exception:
                 s.rollback()
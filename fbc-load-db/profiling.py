@@ -0,0 +1,129 @@
+# ============================================================= #
+# Copyright (c) 2025 Francisco Vivas Puerto (aka "DaFrancc").
+# All rights reserved.
+# ============================================================= #
+"""
+Opt-in sampling profiler for the scrape -> load pipeline.
+
+With LOADER_PROFILE=1, a @profiled function is sampled (every PROFILE_INTERVAL_MS,
+across all threads, so the scraper pool is included) and the stacks are written to
+PROFILE_DIR as collapsed stacks (flamegraph.pl, speedscope, inferno) or, with
+PROFILE_FORMAT=speedscope, as a speedscope JSON file. Nested @profiled calls are
+folded into the outermost profile.
+"""
+
+from typing import Any, Callable, Dict, List
+import os
+import sys
+import json
+import time
+import logging
+import functools
+import threading
+from collections import Counter
+
+log = logging.getLogger(__name__)
+
+LOADER_PROFILE = os.getenv("LOADER_PROFILE", "0") == "1"
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "collapsed").lower()  # collapsed | speedscope
+
+_active = threading.Lock()
+
+
+def _frame_name(code) -> str:
+    # ';' separates frames in collapsed stacks, so it must not appear in a name
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread (except its own) on a timer and counts
+    identical stacks. Stacks are root-first and prefixed with the thread name.
+    """
+
+    def __init__(self, interval_s: float) -> None:
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fbc-profiler", daemon=True)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[tuple(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        frames: Dict[str, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.items():
+            samples.append([frames.setdefault(f, len(frames)) for f in stack])
+            weights.append(count * self.interval_s * 1e3)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": [{"name": f} for f in frames]},
+            "profiles": [{
+                "type": "sampled", "name": name, "unit": "milliseconds",
+                "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights,
+            }],
+        }
+
+    def write(self, name: str) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        if PROFILE_FORMAT == "speedscope":
+            path = os.path.join(PROFILE_DIR, f"{name}-{stamp}.speedscope.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.speedscope(name), f)
+        else:
+            path = os.path.join(PROFILE_DIR, f"{name}-{stamp}.collapsed")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.collapsed())
+        return path
+
+
+def profiled(name: str) -> Callable:
+    """
+    Profiles the decorated function when LOADER_PROFILE=1 and no outer profile is running.
+    """
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not LOADER_PROFILE or not _active.acquire(blocking=False):
+                return fn(*args, **kwargs)
+            profiler = SamplingProfiler(PROFILE_INTERVAL_MS / 1e3).start()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.stop()
+                _active.release()
+                try:
+                    path = profiler.write(name)
+                    log.info("profile of %s: %d samples -> %s", name, profiler.samples, path)
+                except OSError as e:
+                    log.warning("could not write profile of %s: %s", name, e)
+        return wrapper
+    return decorate
@@ -21,6 +21,9 @@ import asyncio
 import inspect
 import queue
 
+from tracing import in_current_context, set_attributes, traced
+from profiling import profiled
+
 # ----------------------------------------------------------------------------
 # Logging
 # ----------------------------------------------------------------------------
@@ -102,7 +105,7 @@ def _call_with_timeout(fn: Callable[[], Any], timeout_s: float) -> Any:
         except BaseException as e:
             q.put((False, e))
 
-    t = threading.Thread(target=runner, daemon=True)
+    t = threading.Thread(target=in_current_context(runner), daemon=True)
     t.start()
     try:
         ok, val = q.get(timeout=timeout_s)
@@ -115,6 +118,7 @@ def _call_with_timeout(fn: Callable[[], Any], timeout_s: float) -> Any:
 # ----------------------------------------------------------------------------
 # Core runner for a single scraper (with timeout + robust error handling)
 # ----------------------------------------------------------------------------
+@traced("scraper.run_one")
 def _run_one(pyfile: pathlib.Path) -> List[Dict[str, Any]]:
     """
     Execute a single scraper and return a list of dictionaries.
@@ -124,6 +128,7 @@ def _run_one(pyfile: pathlib.Path) -> List[Dict[str, Any]]:
     - Gracefully returns [] on error or timeout (does not raise)
     """
     started = time.perf_counter()
+    set_attributes(**{"scraper.file": pyfile.name})
     print(f"[scraper] START  {pyfile.name}")
     try:
         mod = _load_module(pyfile)
@@ -155,13 +160,16 @@ def _run_one(pyfile: pathlib.Path) -> List[Dict[str, Any]]:
                 valid.append(item)
             else:
                 print(f"[scraper] WARN   {pyfile.name}: item #{idx} is {type(item).__name__}, skipping", file=sys.stderr)
+        set_attributes(**{"scraper.outcome": "ok", "scraper.rows": len(valid)})
         return valid
 
     except TimeoutError as te:
         print(f"[scraper] TIMEOUT {pyfile.name}: {te}", file=sys.stderr)
+        set_attributes(**{"scraper.outcome": "timeout"})
         return []
     except Exception:
         print(f"[scraper] ERROR  {pyfile.name} failed:\n{traceback.format_exc()}", file=sys.stderr)
+        set_attributes(**{"scraper.outcome": "error"})
         return []
     finally:
         dur = time.perf_counter() - started
@@ -170,6 +178,8 @@ def _run_one(pyfile: pathlib.Path) -> List[Dict[str, Any]]:
 # ----------------------------------------------------------------------------
 # Public API
 # ----------------------------------------------------------------------------
+@profiled("scraper")
+@traced("scraper.scrape")
 def scrape() -> List[Dict[str, Any]]:
     """
     Run all scrapers listed in `scrapers.txt` concurrently.
@@ -189,7 +199,8 @@ def scrape() -> List[Dict[str, Any]]:
     try:
         start_all = time.perf_counter()
         with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
-            future_map = {ex.submit(_run_one, f): f for f in files}
+            # each task runs in a copy of this context so its span nests under scraper.scrape
+            future_map = {ex.submit(in_current_context(_run_one), f): f for f in files}
             for fut in as_completed(future_map):
                 pyfile = future_map[fut]
                 try:
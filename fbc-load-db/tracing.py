@@ -0,0 +1,174 @@
+# ============================================================= #
+# Copyright (c) 2025 Francisco Vivas Puerto (aka "DaFrancc").
+# All rights reserved.
+# ============================================================= #
+"""
+Optional OpenTelemetry tracing for the scrape -> load pipeline.
+
+Tracing is off unless OTEL_TRACES_EXPORTER is "console" (spans printed to stderr)
+or "file" (one JSON span per line appended to OTEL_TRACES_FILE), and the
+opentelemetry-sdk package is installed. When off, every helper here is a no-op,
+so call sites never need to check.
+"""
+
+from typing import Any, Callable, Iterator, Optional
+import os
+import sys
+import logging
+import functools
+import contextvars
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+OTEL_TRACES_EXPORTER = os.getenv("OTEL_TRACES_EXPORTER", "").lower()
+OTEL_TRACES_FILE = os.getenv("OTEL_TRACES_FILE", "traces.jsonl")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "fbc-loader")
+
+tracer = None
+
+
+def _init_tracing() -> None:
+    """
+    Installs a TracerProvider with a console or file exporter, if requested and available.
+    """
+    global tracer
+    if OTEL_TRACES_EXPORTER not in ("console", "file"):
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        log.warning("OTEL_TRACES_EXPORTER=%s but opentelemetry-sdk is not installed; tracing disabled",
+                    OTEL_TRACES_EXPORTER)
+        return
+
+    if OTEL_TRACES_EXPORTER == "file":
+        out = open(OTEL_TRACES_FILE, "a", encoding="utf-8")
+        exporter = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    else:
+        exporter = ConsoleSpanExporter(out=sys.stderr)
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    provider.add_span_processor(BatchSpanProcessor(exporter))  # flushed by the provider's atexit shutdown
+    trace.set_tracer_provider(provider)
+    tracer = trace.get_tracer("fbc.loader")
+    _instrument_http()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Any]]:
+    """
+    Runs the block inside a child span of the current one; yields the span (None when off).
+    Exceptions are recorded on the span and re-raised.
+    """
+    if tracer is None:
+        yield None
+        return
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator form of span().
+    """
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if tracer is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def set_attributes(**attributes: Any) -> None:
+    """
+    Adds attributes to the current span, if any.
+    """
+    if tracer is None:
+        return
+    from opentelemetry import trace
+    trace.get_current_span().set_attributes(attributes)
+
+
+def in_current_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Binds fn to a copy of the caller's context, so spans started in another thread
+    (thread pools, timeout helpers) keep their parent.
+    """
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+# ----------------------------------------------------------------------------
+# Outbound HTTP (requests, aiohttp)
+# ----------------------------------------------------------------------------
+def _instrument_http() -> None:
+    """
+    Wraps every outbound requests/aiohttp call in a CLIENT span. Scrapers call
+    requests.get()/session.get() directly, so this patches the libraries once.
+    """
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+
+    try:
+        import requests
+    except ImportError:
+        requests = None
+    if requests is not None and not getattr(requests.Session.request, "_fbc_traced", False):
+        original = requests.Session.request
+
+        @functools.wraps(original)
+        def request(self, method, url, *args, **kwargs):
+            with tracer.start_as_current_span(f"HTTP {method.upper()}", kind=SpanKind.CLIENT,
+                                              attributes={"http.method": method.upper(), "http.url": str(url)}) as s:
+                resp = original(self, method, url, *args, **kwargs)
+                s.set_attribute("http.status_code", resp.status_code)
+                if resp.status_code >= 400:
+                    s.set_status(Status(StatusCode.ERROR))
+                return resp
+
+        request._fbc_traced = True
+        requests.Session.request = request
+
+    try:
+        import aiohttp
+    except ImportError:
+        return
+    if getattr(aiohttp.ClientSession.__init__, "_fbc_traced", False):
+        return
+
+    async def on_start(session, ctx, params):
+        ctx.span = tracer.start_span(f"HTTP {params.method}", kind=SpanKind.CLIENT,
+                                     attributes={"http.method": params.method, "http.url": str(params.url)})
+
+    async def on_end(session, ctx, params):
+        ctx.span.set_attribute("http.status_code", params.response.status)
+        if params.response.status >= 400:
+            ctx.span.set_status(Status(StatusCode.ERROR))
+        ctx.span.end()
+
+    async def on_exception(session, ctx, params):
+        ctx.span.record_exception(params.exception)
+        ctx.span.set_status(Status(StatusCode.ERROR))
+        ctx.span.end()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_start)
+    trace_config.on_request_end.append(on_end)
+    trace_config.on_request_exception.append(on_exception)
+    original_init = aiohttp.ClientSession.__init__
+
+    @functools.wraps(original_init)
+    def init(self, *args, **kwargs):
+        kwargs["trace_configs"] = list(kwargs.get("trace_configs") or []) + [trace_config]
+        original_init(self, *args, **kwargs)
+
+    init._fbc_traced = True
+    aiohttp.ClientSession.__init__ = init
+
+
+_init_tracing()
@@ -28,23 +28,61 @@ Behavior:
 from __future__ import annotations
 
 
+import io
 import os
 import re
+import sys
+import csv
+import hmac
+import gzip
+import json
+import hashlib
 import uuid
+import time
+import queue
+import atexit
+import base64
+import random
 import logging
-from typing import Any, Dict, List, Optional, Tuple
-
-from flask import Flask, jsonify, request, g
-from flask_cors import CORS
-from sqlalchemy import create_engine, text
+import functools
+import datetime
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from flask import Flask, Response, jsonify, request, g, has_request_context
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import (
+    BigInteger, Column, ColumnElement, MetaData, Select, String, TIMESTAMP, Table, Text,
+    and_, bindparam, case, cast, create_engine, event, func, literal, literal_column, or_, select, text, true, tuple_,
+    union_all,
+)
 from sqlalchemy.engine import Engine, Row
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.sql.visitors import InternalTraversal
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy.exc import (
+    DisconnectionError,
     OperationalError,
     ProgrammingError,
     IntegrityError,
     TimeoutError as SQLAlchemyTimeout,
 )
 
+try:
+    import orjson  # optional: faster JSON encoding
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+try:
+    import brotli  # optional: br content-encoding
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
 
 # -------------------------------------------------------------------------
 # Configuration
@@ -58,7 +96,71 @@ DATABASE_URL = os.getenv(
 
 DB_SCHEMA = os.getenv("DB_SCHEMA", "app")
 MAX_PAGE_SIZE = int(os.getenv("MAX_REQUESTS", "50"))
+SEARCH_RESULT_LIMIT = int(os.getenv("SEARCH_RESULT_LIMIT", "100"))
+FACET_LIMIT = int(os.getenv("FACET_LIMIT", "100"))  # values per facet field, most frequent first
+QUERY_SHAPE_CACHE_SIZE = int(os.getenv("QUERY_SHAPE_CACHE_SIZE", "512"))  # built statements kept, LRU
+COUNT_EXACT_CAP = int(os.getenv("COUNT_EXACT_CAP", "10000"))  # count=exact stops counting here
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "100"))
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
 REQUEST_LOG_LEVEL = os.getenv("REQUEST_LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json | text
+# Lambda freezes the container between invocations, which would strand queued records; log synchronously there
+LOG_ASYNC = os.getenv("LOG_ASYNC", "0" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "1") == "1"
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+SQL_LOG_SAMPLE_RATE = float(os.getenv("SQL_LOG_SAMPLE_RATE", "0.01"))
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))
+OTEL_TRACES_EXPORTER = os.getenv("OTEL_TRACES_EXPORTER", "").lower()  # console | file
+OTEL_TRACES_FILE = os.getenv("OTEL_TRACES_FILE", "traces.jsonl")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "fbc-api")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/fbc-profiles")  # /tmp is the writable path on Lambda
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "collapsed").lower()  # collapsed | speedscope
+EXPLAIN_SAMPLE_RATE = float(os.getenv("EXPLAIN_SAMPLE_RATE", "0.2"))
+EXPLAIN_COOLDOWN_SECS = float(os.getenv("EXPLAIN_COOLDOWN_SECS", "300"))
+EXPLAIN_TIMEOUT_MS = float(os.getenv("EXPLAIN_TIMEOUT_MS", "5000"))
+SLOW_PLAN_BUFFER = int(os.getenv("SLOW_PLAN_BUFFER", "50"))
+QUERY_LOG_MAX_FINGERPRINTS = int(os.getenv("QUERY_LOG_MAX_FINGERPRINTS", "256"))
+
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+CACHE_TTL_SECS = float(os.getenv("CACHE_TTL_SECS", "300"))
+CACHE_NEGATIVE_TTL_SECS = float(os.getenv("CACHE_NEGATIVE_TTL_SECS", "60"))
+CACHE_VERSION_CHECK_SECS = float(os.getenv("CACHE_VERSION_CHECK_SECS", "30"))
+REDIS_URL = os.getenv("REDIS_URL")
+L2_TTL_SECS = float(os.getenv("L2_TTL_SECS", "900"))
+L2_LOCK_TTL_SECS = float(os.getenv("L2_LOCK_TTL_SECS", "10"))
+L2_COALESCE_WAIT_SECS = float(os.getenv("L2_COALESCE_WAIT_SECS", "2"))
+L2_SOCKET_TIMEOUT_SECS = float(os.getenv("L2_SOCKET_TIMEOUT_SECS", "0.25"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+HTTP_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300")
+CORS_MAX_AGE = int(os.getenv("CORS_MAX_AGE", "86400"))
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto").lower()
+READ_MODE = os.getenv("READ_MODE", "rows").lower()  # rows | json_agg
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+SCHEMA_RECHECK_SECS = float(os.getenv("SCHEMA_RECHECK_SECS", "30"))
+PREWARM_DB = os.getenv("PREWARM_DB", "0") == "1"
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()  # queue | keepalive | null
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_SECS = float(os.getenv("DB_POOL_TIMEOUT_SECS", "10"))
+DB_POOL_RECYCLE_SECS = int(os.getenv("DB_POOL_RECYCLE_SECS", "300"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+DB_KEEPALIVE_IDLE_SECS = int(os.getenv("DB_KEEPALIVE_IDLE_SECS", "30"))
+DB_LIVENESS_IDLE_SECS = float(os.getenv("DB_LIVENESS_IDLE_SECS", "60"))
+DB_PREPARE_THRESHOLD = os.getenv("DB_PREPARE_THRESHOLD", "5")  # executions before preparing; "none" disables
+DB_PREPARED_MAX = int(os.getenv("DB_PREPARED_MAX", "100"))  # prepared shapes kept per connection (LRU)
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "0") == "1"  # transaction pooling: no server-side prepared statements
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PUSH_URL = os.getenv("METRICS_PUSH_URL")  # Pushgateway base URL; enables push mode
+METRICS_PUSH_INTERVAL_SECS = float(os.getenv("METRICS_PUSH_INTERVAL_SECS", "15"))
+METRICS_PUSH_TIMEOUT_SECS = float(os.getenv("METRICS_PUSH_TIMEOUT_SECS", "0.5"))
+METRICS_JOB = os.getenv("METRICS_JOB", "fbc-api")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "0") == "1"
 
 
 ALLOWED_TYPES: Dict[str, str] = {
@@ -69,40 +171,617 @@ ALLOWED_TYPES: Dict[str, str] = {
 
 _IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
+# Loader-maintained helper columns that are never part of the public payload.
+INTERNAL_COLUMNS = frozenset({"id_num", "search_doc", "zipcode_norm"})
+
+# Text-search configuration; must match the search_doc columns built by fbc-load-db/main.py.
+SEARCH_CONFIG = "english"
+
+# Plain-text columns ts_headline draws /v1/search snippets from (the strongest first).
+SNIPPET_COLUMNS: Dict[str, List[str]] = {
+    "foodbanks": ["about", "city", "address", "eligibility", "urgency"],
+    "programs": ["about", "program_type", "host", "eligibility", "frequency"],
+    "sponsors": ["about", "affiliation", "contribution", "past_involvement", "city"],
+}
+
 # ------------------------------------------------------------------------------
 # Application / engine / logging
 # ------------------------------------------------------------------------------
 
+class RawJSON(str):
+    """
+    Pre-encoded JSON text (e.g. from json_agg) that providers splice into output verbatim.
+    """
+
+
+def _dumps_with_raw(obj: Any, dumps: Callable[[Any], str]) -> str:
+    """
+    Serializes obj with dumps, splicing RawJSON values of a top-level dict (or a top-level
+    RawJSON) into the output without decoding them.
+    """
+    if isinstance(obj, RawJSON):
+        return str(obj)
+    if isinstance(obj, dict):
+        raw = [(k, v) for k, v in obj.items() if isinstance(v, RawJSON)]
+        if raw:
+            rest = dumps({k: v for k, v in obj.items() if not isinstance(v, RawJSON)})
+            spliced = ",".join(f"{json.dumps(k)}:{v}" for k, v in raw)
+            return rest[:-1] + ("," if rest != "{}" else "") + spliced + "}"
+    return dumps(obj)
+
+
+def _merge_raw_object(raw: RawJSON, extra: Dict[str, Any]) -> RawJSON:
+    """
+    Prepends extra members to a pre-encoded JSON object.
+    """
+    head = app.json.dumps(extra)[1:-1]
+    return RawJSON("{" + head + ("," if head and raw != "{}" else "") + raw[1:])
+
+
+def _json_default(obj: Any) -> Any:
+    """
+    JSON fallback shared by both providers, so both encode dates (as HTTP dates), Decimal,
+    UUID, ... the way Flask's default provider does. Rows are turned into dicts before encoding.
+    """
+    return DefaultJSONProvider.default(obj)
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """
+    Flask's json-module provider, extended to splice RawJSON.
+    """
+
+    default = staticmethod(_json_default)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return _dumps_with_raw(obj, lambda o: super(StdlibJSONProvider, self).dumps(o, **kwargs))
+
+    def response(self, *args: Any, **kwargs: Any):
+        with _phase("serialize"):
+            return super().response(*args, **kwargs)
+
+
+class OrjsonJSONProvider(DefaultJSONProvider):
+    """
+    orjson-backed provider. Datetimes are routed through the shared default so the output
+    matches the stdlib provider value for value; keys are sorted for stable ETags.
+    """
+
+    option = 0
+
+    def _dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj, default=_json_default, option=self.option).decode("utf-8")
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return _dumps_with_raw(obj, self._dumps)
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        t0 = time.perf_counter()
+        if isinstance(obj, RawJSON) or (isinstance(obj, dict) and any(isinstance(v, RawJSON) for v in obj.values())):
+            body = (self.dumps(obj) + "\n").encode("utf-8")
+        else:
+            body = orjson.dumps(obj, default=_json_default, option=self.option | orjson.OPT_APPEND_NEWLINE)
+        _record_phase("serialize", time.perf_counter() - t0)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def _json_provider_class() -> type:
+    """
+    Picks the JSON provider from JSON_PROVIDER (auto | orjson | stdlib).
+    """
+    if JSON_PROVIDER == "stdlib" or (JSON_PROVIDER == "auto" and orjson is None):
+        return StdlibJSONProvider
+    if orjson is None:
+        raise RuntimeError("JSON_PROVIDER=orjson but the orjson package is not installed.")
+    return OrjsonJSONProvider
+
+
+if orjson is not None:
+    OrjsonJSONProvider.option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SORT_KEYS
+
+
 app = Flask(__name__)
-CORS(app)
+app.json = _json_provider_class()(app)
 
 
-engine: Engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,
-    future=True,
-)
+class _LazySetup:
+    """
+    WSGI wrapper that finishes app setup (CORS) right before the first request is served,
+    so cold starts that never serve a request, and the import itself, skip that work.
+    """
+
+    def __init__(self, wsgi_app: Callable) -> None:
+        self.wsgi_app = wsgi_app
+        self._done = False
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if not self._done:
+            with self._lock:
+                if not self._done:
+                    from flask_cors import CORS
+                    # browsers only let scripts read non-safelisted headers that are exposed
+                    CORS(app, max_age=CORS_MAX_AGE, expose_headers=["X-Total-Count", "X-Total-Count-Accuracy"])
+                    self._done = True
+        return self.wsgi_app(environ, start_response)
+
+
+app.wsgi_app = _LazySetup(app.wsgi_app)
+
+
+class PoolTelemetry:
+    """
+    Thread-safe counters for connection checkouts: how long callers waited for a
+    connection (including connects), new connections, and liveness checks.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connects = 0
+        self.liveness_checks = 0
+        self.liveness_failures = 0
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def count(self, attr: str) -> None:
+        with self._lock:
+            setattr(self, attr, getattr(self, attr) + 1)
+
+    def stats(self, pool=None) -> Dict[str, Any]:
+        with self._lock:
+            out = {
+                "mode": DB_POOL_MODE,
+                "checkouts": self.checkouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1e3, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1e3, 3),
+                "connects": self.connects,
+                "liveness_checks": self.liveness_checks,
+                "liveness_failures": self.liveness_failures,
+            }
+        if isinstance(pool, QueuePool):
+            out.update(size=pool.size(), checked_out=pool.checkedout(),
+                       checked_in=pool.checkedin(), overflow=pool.overflow())
+        return out
+
+
+pool_telemetry = PoolTelemetry()
+
+
+
+
+class _TimedCheckout:
+    """
+    Pool mixin that times _do_get, i.e. queueing for a free slot plus any new connect.
+    """
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - t0
+            pool_telemetry.record_wait(waited)
+            _record_phase("checkout", waited)
+            POOL_WAIT_SECONDS.observe(waited)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedNullPool(_TimedCheckout, NullPool):
+    pass
+
+
+
+
+def _engine_options() -> Dict[str, Any]:
+    """
+    create_engine() pool arguments for DB_POOL_MODE:
+
+    - queue: sized QueuePool with pool_recycle, pinging on every checkout (DB_POOL_PRE_PING)
+    - keepalive: the same pool, but liveness comes from TCP keepalives plus a ping only
+      for connections idle longer than DB_LIVENESS_IDLE_SECS
+    - null: no pooling; for RDS Proxy / pgbouncer, which pool on their side
+    """
+    if DB_POOL_MODE == "null":
+        return {"poolclass": TimedNullPool}
+    if DB_POOL_MODE not in ("queue", "keepalive"):
+        raise ValueError(f"unknown DB_POOL_MODE {DB_POOL_MODE!r}")
+    options: Dict[str, Any] = {
+        "poolclass": TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_SECS,
+        "pool_recycle": DB_POOL_RECYCLE_SECS,
+        "pool_pre_ping": DB_POOL_PRE_PING and DB_POOL_MODE == "queue",
+    }
+    if DB_POOL_MODE == "keepalive":
+        options["connect_args"] = {
+            "keepalives": 1,
+            "keepalives_idle": DB_KEEPALIVE_IDLE_SECS,
+            "keepalives_interval": max(1, DB_KEEPALIVE_IDLE_SECS // 3),
+            "keepalives_count": 3,
+        }
+    return options
+
+
+
+
+def _prepare_threshold() -> Optional[int]:
+    """
+    Returns psycopg's prepare_threshold for DB_PREPARE_THRESHOLD, or None (never prepare)
+    behind pgbouncer, whose transaction pooling hands statements to arbitrary server sessions,
+    and in the null pool mode, which is meant for such external poolers and closes every
+    connection after one request anyway.
+    """
+    raw = DB_PREPARE_THRESHOLD.strip().lower()
+    if DB_PGBOUNCER or DB_POOL_MODE == "null" or raw in ("", "none", "off"):
+        return None
+    return int(raw)
+
+
+def _on_connect(dbapi_conn, record) -> None:
+    """
+    Counts the connect and applies the prepared-statement policy. psycopg 3 prepares a
+    statement server-side once the same SQL text has run prepare_threshold times on the
+    connection and keeps the DB_PREPARED_MAX most recently used ones, so recurring query
+    shapes skip parsing and, once Postgres settles on a generic plan, planning.
+    """
+    pool_telemetry.count("connects")
+    conn = getattr(dbapi_conn, "driver_connection", dbapi_conn)
+    if hasattr(conn, "prepare_threshold"):  # psycopg 3 only
+        conn.prepare_threshold = _prepare_threshold()
+        conn.prepared_max = DB_PREPARED_MAX
+
+
+def prepared_stats() -> Dict[str, Any]:
+    """
+    Prepared-statement settings plus what one pooled connection currently holds
+    (pg_prepared_statements is per session). Never raises.
+    """
+    stats: Dict[str, Any] = {
+        "threshold": _prepare_threshold(),
+        "max_per_connection": DB_PREPARED_MAX,
+        "pgbouncer": DB_PGBOUNCER,
+    }
+    if _engine is None:
+        return stats
+    try:
+        with _engine.connect() as conn:
+            rows = conn.execute(text(
+                """
+                SELECT generic_plans, custom_plans, left(statement, 200) AS statement
+                FROM pg_prepared_statements
+                ORDER BY generic_plans + custom_plans DESC
+                """
+            )).fetchall()
+        stats["sample_connection"] = {
+            "prepared": len(rows),
+            "statements": [dict(r._mapping) for r in rows[:20]],
+        }
+    except Exception as e:
+        stats["sample_connection"] = {"error": str(e)}
+    return stats
+
+
+def _on_checkin(dbapi_conn, record) -> None:
+    record.info["checked_in_at"] = time.monotonic()
+
+
+def _on_checkout_liveness(dbapi_conn, record, proxy) -> None:
+    """
+    Pings a connection only when it sat idle past DB_LIVENESS_IDLE_SECS; a failed ping
+    raises DisconnectionError so the pool discards it and retries with a fresh one.
+    """
+    idle_since = record.info.get("checked_in_at")
+    if idle_since is None or time.monotonic() - idle_since < DB_LIVENESS_IDLE_SECS:
+        return
+    pool_telemetry.count("liveness_checks")
+    try:
+        cur = dbapi_conn.cursor()
+        cur.execute("SELECT 1")
+        cur.close()
+    except Exception as e:
+        pool_telemetry.count("liveness_failures")
+        raise DisconnectionError(str(e)) from e
+
+
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+    if _tracer is not None:
+        from opentelemetry.trace import SpanKind
+        conn.info.setdefault("query_spans", []).append(_tracer.start_span(
+            "db.query", kind=SpanKind.CLIENT,
+            attributes={"db.system": "postgresql", "db.statement": statement}))
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """
+    Charges statement time (psycopg fetches the result during execute) and rows to the request,
+    and hands the statement to the sampled SQL log and the slow-query log.
+    """
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    if has_request_context():
+        _record_phase("sql", elapsed)
+        if cursor.rowcount and cursor.rowcount > 0:
+            g.rows = g.get("rows", 0) + cursor.rowcount
+    if conn.info.get("query_spans"):
+        span = conn.info["query_spans"].pop()
+        span.set_attribute("db.rows", cursor.rowcount)
+        span.end()
+    _log_sql(statement, parameters, elapsed)
+    query_log.record(statement, parameters, elapsed)
+
+
+def _on_cursor_error(exception_context) -> None:
+    """
+    Unwinds what _before_cursor_execute pushed when the statement failed.
+    """
+    conn = exception_context.connection
+    if conn is None:
+        return
+    if conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+    if conn.info.get("query_spans"):
+        from opentelemetry.trace import Status, StatusCode
+        span = conn.info["query_spans"].pop()
+        span.record_exception(exception_context.original_exception)
+        span.set_status(Status(StatusCode.ERROR))
+        span.end()
+
+
+
+
+_engine: Optional[Engine] = None
+_engine_lock = threading.Lock()
+
+
+
+
+def get_engine() -> Engine:
+    """
+    Returns the pooled engine, creating it (and importing the DB driver) on first use.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(DATABASE_URL, future=True, **_engine_options())
+                event.listen(engine, "connect", _on_connect)
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+                event.listen(engine, "handle_error", _on_cursor_error)
+                if DB_POOL_MODE == "keepalive":
+                    event.listen(engine, "checkin", _on_checkin)
+                    event.listen(engine, "checkout", _on_checkout_liveness)
+                _engine = engine
+    return _engine
 
 
 # -------------------------------------------------------------------------
 # Logging configuration
 # -------------------------------------------------------------------------
-import logging
+# Records go through a QueueHandler; a QueueListener thread formats (JSON by
+# default) and writes them, so request threads never block on stdout. On Lambda
+# (LOG_ASYNC defaults to 0 there) the handler writes them directly. Access
+# and SQL lines are sampled per request; warnings, errors, 5xx responses and
+# anything slower than SLOW_REQUEST_MS are always kept.
 
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-)
-logger = logging.getLogger("fbc.api")
+_LOG_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None)).keys()) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: ts, level, logger, msg, request_id, any `extra` fields, exc.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _LOG_RECORD_ATTRS:
+                out[key] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str)
+
+
+def _stamp_request_id(record: logging.LogRecord) -> bool:
+    """
+    Handler filter that adds the current request id to the record; never drops it.
+    """
+    if has_request_context() and not hasattr(record, "request_id"):
+        record.request_id = g.get("request_id")
+    return True
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    Enqueues the record untouched (message and JSON are built on the listener thread)
+    after stamping the current request id.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        _stamp_request_id(record)
+        return record
+
+
+def _configure_logging() -> logging.Logger:
+    stream = logging.StreamHandler(sys.stdout)
+    if LOG_FORMAT == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
+
+
+    log = logging.getLogger("fbc.api")
+    log.setLevel(REQUEST_LOG_LEVEL)
+    log.propagate = False
+    log.handlers.clear()
+    if LOG_ASYNC:
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        listener = QueueListener(log_queue, stream, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        log.addHandler(_LazyQueueHandler(log_queue))
+    else:
+        stream.addFilter(_stamp_request_id)
+        log.addHandler(stream)
+    return log
+
+
+logger = _configure_logging()
+
+
+
+
+def _sampled(rate: float) -> bool:
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+
+
+def _log_sql(statement: str, parameters: Any, elapsed: float) -> None:
+    """
+    Logs an executed statement for sampled requests (SQL_LOG_SAMPLE_RATE); statements slower
+    than SLOW_QUERY_MS are always logged, at WARNING.
+    """
+    slow = elapsed * 1e3 >= SLOW_QUERY_MS
+    if not slow and not (has_request_context() and g.get("log_sql")):
+        return
+    level = logging.WARNING if slow else logging.INFO
+    if logger.isEnabledFor(level):
+        logger.log(level, "sql", extra={"sql": statement, "params": parameters,
+                                        "duration_ms": round(elapsed * 1e3, 3), "slow": slow})
+
+
+
+
+def _log_access(resp) -> None:
+    """
+    One access line per request: sampled by ACCESS_LOG_SAMPLE_RATE, but always kept for
+    5xx responses and requests slower than SLOW_REQUEST_MS.
+    """
+    started = g.get("started_at")
+    duration_ms = (time.perf_counter() - started) * 1e3 if started is not None else 0.0
+    slow = duration_ms >= SLOW_REQUEST_MS
+    if resp.status_code >= 500 or slow:
+        level = logging.WARNING
+    elif g.get("log_access"):
+        level = logging.INFO
+    else:
+        return
+    if logger.isEnabledFor(level):
+        logger.log(level, "%s %s %s", request.method, request.path, resp.status_code, extra={
+            "method": request.method,
+            "path": request.path,
+            "query": request.args.to_dict(flat=False),
+            "status": resp.status_code,
+            "duration_ms": round(duration_ms, 3),
+            "bytes": resp.calculate_content_length(),
+            "remote_addr": request.remote_addr,
+            "slow": slow,
+        })
+
+
+# -------------------------------------------------------------------------
+# Tracing (optional OpenTelemetry)
+# -------------------------------------------------------------------------
+# Off unless OTEL_TRACES_EXPORTER is "console" (stderr) or "file" (one JSON span
+# per line in OTEL_TRACES_FILE) and opentelemetry-sdk is installed; the SDK is
+# only imported in that case. Each request gets a SERVER span, each statement a
+# CLIENT child span. Provider setup mirrors fbc-load-db/tracing.py (the Lambda image
+# ships app.py alone, so it cannot import it), except that spans are exported
+# synchronously on Lambda. Update both together.
+
+
+_tracer = None
+
+
+
+
+def _init_tracing() -> None:
+    global _tracer
+    if OTEL_TRACES_EXPORTER not in ("console", "file"):
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SimpleSpanProcessor
+    except ImportError:
+        logger.warning("OTEL_TRACES_EXPORTER=%s but opentelemetry-sdk is not installed; tracing disabled",
+                       OTEL_TRACES_EXPORTER)
+        return
+
+
+    if OTEL_TRACES_EXPORTER == "file":
+        out = open(OTEL_TRACES_FILE, "a", encoding="utf-8")
+        exporter = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    else:
+        exporter = ConsoleSpanExporter(out=sys.stderr)
+    provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    # Lambda freezes between invocations, so export synchronously there instead of batching
+    processor = SimpleSpanProcessor if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else BatchSpanProcessor
+    provider.add_span_processor(processor(exporter))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("fbc.api")
+
+
+_init_tracing()
+
+
+
+
+def _start_request_span() -> None:
+    from opentelemetry import context, trace
+    from opentelemetry.trace import SpanKind
+
+    rule = request.url_rule.rule if request.url_rule is not None else request.path
+    span = _tracer.start_span(f"{request.method} {rule}", kind=SpanKind.SERVER, attributes={
+        "http.method": request.method,
+        "http.route": rule,
+        "http.target": request.full_path,
+        "fbc.request_id": _request_id(),
+    })
+    g.otel_span = span
+    g.otel_token = context.attach(trace.set_span_in_context(span))
+
+
+def _end_request_span(exc: Optional[BaseException]) -> None:
+    from opentelemetry import context
+    from opentelemetry.trace import Status, StatusCode
+
+    span = g.pop("otel_span", None)
+    if span is None:
+        return
+    if exc is not None:
+        span.record_exception(exc)
+        span.set_status(Status(StatusCode.ERROR))
+    span.end()
+    context.detach(g.pop("otel_token"))
+
 
 
-if not logger.handlers:
-    handler = logging.StreamHandler()
-    handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s"))
-    logger.addHandler(handler)
-logger.setLevel(logging.INFO)
-logger.propagate = True
 
 # ------------------------------------------------------------------------------
 # Utilities: request ids, JSON error format, schema/table helpers
@@ -130,9 +809,22 @@ def json_error(status: int, code: str, message: str, *, details: Dict[str, Any]
     }
     if details:
         payload["details"] = details
+    if has_request_context():
+        g.error_code = code
     return jsonify(payload), status
 
 
+def json_response(payload: Any):
+    """
+    jsonify(payload) with the request id added. The payload is encoded first and its digest
+    kept as the ETag source (see _apply_http_caching), so the tag never covers the request id.
+    """
+    with _phase("serialize"):
+        body = RawJSON(app.json.dumps(payload))
+    g.etag_digest = hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+    return jsonify(_merge_raw_object(body, {"request_id": _request_id()}))
+
+
 
 
 def _validate_ident(name: str) -> str:
@@ -153,419 +845,2414 @@ def _table_qualified(resource: str) -> str:
     return f"{SCHEMA}.{resource}"
 
 
-def _table_exists(table_qualified: string) -> bool:
+def _service_not_ready(table_qualified: str):
     """
-    Returns True if the schema-qualified table exists.
+    Builds the 503 response returned while a required table is missing.
     """
-    schema, table = table_qualified.split(".", 1)
-    sql = text(
-        """
-        SELECT EXISTS (
-            SELECT 1
-            FROM information_schema.tables
-            WHERE table_schema = :schema AND table_name = :table
+    return json_error(
+        503,
+        "ServiceNotReady",
+        "Required database table is missing.",
+        details={"schema": SCHEMA, "missing": [table_qualified]},
+    )
+
+
+class SchemaCatalog:
+    """
+    Per-process snapshot of which resource tables exist and their columns.
+    Loaded with one information_schema query on first use, then served from memory.
+    It is reloaded only after invalidate() (a ProgrammingError or a data-version bump),
+    or every SCHEMA_RECHECK_SECS while some table is still missing.
+    """
+
+    def __init__(self, schema: str, tables: List[str], recheck_secs: float):
+        self.schema = schema
+        self.tables = list(tables)
+        self.recheck_secs = recheck_secs
+        self._columns: Optional[Dict[str, List[str]]] = None
+        self._loaded_at: Optional[float] = None
+        self._checked_at: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, List[str]]:
+        sql = text(
+            """
+            SELECT table_name, column_name
+            FROM information_schema.columns
+            WHERE table_schema = :schema AND table_name = ANY(:tables)
+            ORDER BY table_name, ordinal_position
+            """
+        )
+        with get_engine().connect() as conn:
+            rows = conn.execute(sql, {"schema": self.schema, "tables": self.tables}).fetchall()
+        columns: Dict[str, List[str]] = {}
+        for table_name, column_name in rows:
+            columns.setdefault(table_name, []).append(column_name)
+        return columns
+
+    def _snapshot(self) -> Dict[str, List[str]]:
+        columns = self._columns
+        stale = (
+            columns is None
+            or (len(columns) < len(self.tables) and time.monotonic() - self._loaded_at >= self.recheck_secs)
         )
+        if not stale:
+            return columns
+        with self._lock:
+            if self._columns is columns:
+                self._columns = self._load()
+                self._loaded_at = time.monotonic()
+                self._checked_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+                logger.info("schema catalog loaded: %s", sorted(self._columns))
+            return self._columns
+
+    def has_table(self, table: str) -> bool:
         """
-    )
-    with engine.connect() as conn:
-        return bool(conn.execute(sql, {"schema": schema, "table": table}).scalar())
+        Returns True if the (unqualified) table exists in the schema.
+        """
+        return table in self._snapshot()
+
+    def columns(self, table: str) -> List[str]:
+        """
+        Returns the table's column names in ordinal order (empty if the table is missing).
+        """
+        return list(self._snapshot().get(table, []))
+
+    def invalidate(self) -> None:
+        """
+        Forces the next lookup to reload the catalog.
+        """
+        with self._lock:
+            self._columns = None
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Readiness summary for /health; loads the catalog if needed but never raises.
+        """
+        try:
+            columns = self._snapshot()
+        except Exception as e:
+            return {"ready": False, "error": str(e), "checked_at": self._checked_at}
+        missing = [t for t in self.tables if t not in columns]
+        return {"ready": not missing, "missing": missing, "checked_at": self._checked_at}
+
+
+schema_catalog = SchemaCatalog(SCHEMA, list(ALLOWED_TYPES), SCHEMA_RECHECK_SECS)
+
+
+def _table_exists(table_qualified: str) -> bool:
+    """
+    Returns True if the schema-qualified table exists (answered from the schema catalog).
+    """
+    schema, table = table_qualified.split(".", 1)
+    if schema != schema_catalog.schema:
+        return False
+    with _phase("table"):
+        return schema_catalog.has_table(table)
 
 
 
 
 # ------------------------------------------------------------------------------
-# Row mappers
+# Sparse fieldsets (fields= / exclude=)
 # ------------------------------------------------------------------------------
 
 
-def _row_to_dict(row: Row) -> Dict[str, Any]:
+# Public columns per resource, in model order. Mirrors the ORM models in fbc-load-db/main.py
+# (the API image does not ship the loader), so update both when a model changes.
+RESOURCE_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "foodbanks": (
+        "id", "name", "about", "address", "capacity", "city", "state", "eligibility", "image",
+        "languages", "open_hours", "phone", "services", "urgency", "website", "zipcode",
+        "fetched_at", "created_at",
+    ),
+    "programs": (
+        "id", "name", "program_type", "eligibility", "frequency", "cost", "host", "details_page",
+        "about", "sign_up_link", "image", "links", "fetched_at", "created_at",
+    ),
+    "sponsors": (
+        "id", "name", "image", "alt", "contribution", "contribution_amt", "affiliation",
+        "past_involvement", "about", "sponsor_link", "city", "state", "contact", "media", "ein",
+        "fetched_at", "created_at",
+    ),
+}
+
+# Named field presets, usable wherever a column name is accepted (e.g. fields=card).
+FIELD_PRESETS: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    "card": {
+        "foodbanks": ("id", "name", "city", "state", "zipcode", "urgency", "eligibility"),
+        "programs": ("id", "name", "program_type", "eligibility", "frequency", "cost", "host"),
+        "sponsors": ("id", "name", "image", "alt", "affiliation", "contribution", "city", "state"),
+    },
+}
+
+
+def _resolve_fields(resource: str, fields: Optional[str], exclude: Optional[str]) -> Optional[List[str]]:
+    """
+    Resolves comma-separated fields=/exclude= values into a column list in model order,
+    or None for the full record. id is always included. Raises ValueError on unknown names.
+    """
+    if not fields and not exclude:
+        return None
+    allowed = RESOURCE_COLUMNS[resource]
+    unknown: List[str] = []
+
+    def expand(raw: str) -> set:
+        names = set()
+        for token in (t.strip() for t in raw.split(",")):
+            if not token:
+                continue
+            if token in FIELD_PRESETS:
+                names.update(FIELD_PRESETS[token][resource])
+            elif token in allowed:
+                names.add(token)
+            else:
+                unknown.append(token)
+        return names
+
+    selected = expand(fields) if fields else set(allowed)
+    if exclude:
+        selected -= expand(exclude)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s) for {resource}: {', '.join(unknown)}. "
+            f"Allowed: {', '.join(allowed)}; presets: {', '.join(FIELD_PRESETS)}."
+        )
+    selected.add("id")
+    return [col for col in allowed if col in selected]
+
+
+def _projection(resource: str, fields: Optional[List[str]], extra: List[str] = ()) -> List[str]:
+    """
+    Returns the columns to select: the requested fields (default: every public column) plus
+    any extra columns the query needs, limited to columns the schema catalog knows exist.
+    """
+    available = set(schema_catalog.columns(resource))
+    wanted = list(fields) if fields is not None else list(RESOURCE_COLUMNS[resource])
+    wanted += [col for col in extra if col not in wanted]
+    return [col for col in wanted if col in available] or ["id"]
+
+
+def _select_list(resource: str, fields: Optional[List[str]], extra: List[str] = ()) -> str:
     """
-    Converts a SQLAlchemy Row to a plain dictionary.
+    Renders _projection() as a SELECT column list for text() queries.
     """
-    return dict(row._mapping)
+    return ", ".join(_projection(resource, fields, extra))
 
 
 
 
 # ------------------------------------------------------------------------------
-# Data access
+# Row mappers
 # ------------------------------------------------------------------------------
 
 
-def fetch_one(resource: str, item_id: str) -> Optional[Dict[str, Any]]:
+def _row_to_dict(row: Row, fields: Optional[List[str]] = None) -> Dict[str, Any]:
     """
-    Retrieves a single record by id from the specified resource table.
-    Returns a dictionary if found, otherwise None.
+    Converts a SQLAlchemy Row to a plain dictionary, keeping only the requested fields
+    (or, without a field list, every column except internal helper columns).
     """
-    sql = text(f"SELECT * FROM {_table_qualified(resource)} WHERE id = :item_id")
-    with engine.connect() as conn:
-        row = conn.execute(sql, {"item_id": item_id}).first()
-    return _row_to_dict(row) if row else None
+    mapping = row._mapping
+    if fields is not None:
+        return {k: mapping[k] for k in fields if k in mapping}
+    return {k: v for k, v in mapping.items() if k not in INTERNAL_COLUMNS}
 
 
 
 
-def fetch_list(resource: str, start: Optional[str], size: int,
-               filters: Dict[str, Any] = None, sort: List[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+def _rows_to_items(rows: List[Row], fields: Optional[List[str]] = None) -> List[Any]:
     """
-    Retrieves a page of items using optional filtering and sorting.
-    Returns a list of dictionaries and a next_start cursor if available.
+    Maps fetched rows to response items. When the selected columns are exactly the output
+    columns, each row is zipped with the shared key list (no per-key mapping lookups);
+    otherwise rows are copied into filtered dictionaries.
     """
-    n = _clamp_page_size(size)
-    base = f"SELECT * FROM {_table_qualified(resource)}"
+    if not rows:
+        return []
+    with _phase("map"):
+        keys = list(rows[0]._mapping.keys())
+        if (keys == fields) if fields is not None else INTERNAL_COLUMNS.isdisjoint(keys):
+            return [dict(zip(keys, r)) for r in rows]
+        return [_row_to_dict(r, fields) for r in rows]
 
 
-    filters = filters or {}
-    sort = sort or []
 
 
-    # Build WHERE and ORDER BY dynamically
-    filter_sort_sql, params = _apply_filters_and_sort(resource, filters, sort)
-
+# ------------------------------------------------------------------------------
+# Response cache (in-process LRU + TTL, invalidated by the loader's data version)
+# ------------------------------------------------------------------------------
 
-    sql_str = base + filter_sort_sql + "\nLIMIT :n"
-    params["n"] = n
 
+class ResponseCache:
+    """
+    Thread-safe, size-bounded LRU cache with per-entry expiry.
+    Stores response payloads (without request ids) keyed by a canonicalized request.
+    A cached None is a negative entry (e.g. a 404 id) and uses the shorter negative TTL.
+    """
 
-    with engine.connect() as conn:
-        rows = conn.execute(text(sql_str), params).fetchall()
-   
-    logger.info(f"SQL Query: {sql_str}")
-    logger.info(f"Params: {params}")
+    def __init__(self, max_entries: int, ttl: float, negative_ttl: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Tuple[Any, ...]) -> Tuple[bool, Any]:
+        """
+        Returns (True, value) on a live hit, otherwise (False, None).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if value is None:
+                self.negative_hits += 1
+            return True, value
+
+    def set(self, key: Tuple[Any, ...], value: Any) -> None:
+        """
+        Stores a value, evicting least-recently-used entries beyond max_entries.
+        """
+        ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drops every entry; counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns counters and sizing for the admin stats route.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_secs": self.ttl,
+                "negative_ttl_secs": self.negative_ttl,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+response_cache = ResponseCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECS, CACHE_NEGATIVE_TTL_SECS)
+
+_data_version_state: Dict[str, Any] = {"version": None, "loaded_at": None, "checked_at": None}
+_data_version_lock = threading.Lock()
+
+
+def _data_version() -> Optional[int]:
+    """
+    Returns the loader's data version, re-reading it at most every CACHE_VERSION_CHECK_SECS.
+    A changed version clears the response cache. Lookup failures keep the last known value.
+    """
+    now = time.monotonic()
+    checked_at = _data_version_state["checked_at"]
+    if checked_at is not None and now - checked_at < CACHE_VERSION_CHECK_SECS:
+        return _data_version_state["version"]
+
+    with _data_version_lock:
+        if _data_version_state["checked_at"] is not None and now - _data_version_state["checked_at"] < CACHE_VERSION_CHECK_SECS:
+            return _data_version_state["version"]
+        loaded_at = _data_version_state["loaded_at"]
+        try:
+            with get_engine().connect() as conn:
+                row = conn.execute(
+                    text(f"SELECT version, loaded_at FROM {_table_qualified('data_version')} WHERE id = 1")
+                ).first()
+            version, loaded_at = (row.version, row.loaded_at) if row else (None, None)
+        except Exception as e:
+            logger.warning("data version lookup failed: %s", e)
+            version = _data_version_state["version"]
+        if version != _data_version_state["version"]:
+            if _data_version_state["checked_at"] is not None:
+                logger.info("data version changed %s -> %s; clearing response cache",
+                            _data_version_state["version"], version)
+                schema_catalog.invalidate()
+            response_cache.clear()
+        _data_version_state.update(version=version, loaded_at=loaded_at, checked_at=now)
+        return version
+
+
+def _cache_key(kind: str, resource: str, **parts: Any) -> Optional[Tuple[Any, ...]]:
+    """
+    Builds a canonical cache key (data version, kind, resource, sorted parts).
+    Returns None when caching is disabled.
+    """
+    if not CACHE_ENABLED:
+        return None
+    canonical = tuple(
+        (name, tuple(sorted(value.items())) if isinstance(value, dict) else
+               tuple(value) if isinstance(value, list) else value)
+        for name, value in sorted(parts.items())
+    )
+    return (_data_version(), kind, resource) + canonical
+
+
+class TableMissing(Exception):
+    """
+    Raised by cache loaders when a resource table does not exist (maps to 503 ServiceNotReady).
+    """
+
+    def __init__(self, table_qualified: str):
+        super().__init__(table_qualified)
+        self.table = table_qualified
+
+
+class UncacheableResult(Exception):
+    """
+    Raised by cache loaders to hand back a value that must not be cached (e.g. partial results).
+    """
+
+    def __init__(self, value: Any):
+        super().__init__("uncacheable result")
+        self.value = value
+
+
+def _cached(key: Optional[Tuple[Any, ...]], compute: Callable[[], Any]) -> Any:
+    """
+    Returns the value for key from the local cache, then the shared cache, else compute().
+    Exceptions from compute() propagate and nothing is cached. key None bypasses caching.
+    """
+    try:
+        if key is None:
+            return compute()
+        hit, value = response_cache.get(key)
+        if hit:
+            CACHE_TOTAL.inc("l1_hit")
+            return value
+        computed = []
+
+        def tracked():
+            computed.append(True)
+            return compute()
+
+        value = shared_cache.get_or_compute(key, tracked) if shared_cache else tracked()
+        CACHE_TOTAL.inc("miss" if computed else "l2_hit")
+    except UncacheableResult as partial:
+        CACHE_TOTAL.inc("miss")
+        return partial.value
+    response_cache.set(key, value)
+    return value
+
+
+
+
+# ------------------------------------------------------------------------------
+# Shared (L2) cache over a Redis-protocol client
+# ------------------------------------------------------------------------------
+# REDIS_URL selects the backend: unset disables the tier, "memory://" uses the
+# in-process stand-in below (local runs and tests), anything else is handed to
+# redis.Redis.from_url (the `redis` package is only imported in that case).
+
+
+class MemoryRedis:
+    """
+    Minimal in-memory stand-in for the Redis commands the shared cache uses (GET, SET NX/PX, DELETE).
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Optional[float], bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name: str, value: Any, ex: Optional[float] = None, px: Optional[int] = None,
+            nx: bool = False) -> Optional[bool]:
+        ttl = ex if ex is not None else (px / 1000.0 if px is not None else None)
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        with self._lock:
+            current = self._data.get(name)
+            if nx and current is not None and (current[0] is None or current[0] > time.monotonic()):
+                return None
+            self._data[name] = (time.monotonic() + ttl if ttl is not None else None, value)
+            return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+
+class SharedCache:
+    """
+    Second-tier cache shared by every API instance. Values are stored as the JSON the
+    API would send, under keys namespaced by data version. Concurrent misses for one key
+    are coalesced: the instance that wins a short SET NX lock recomputes, the others poll
+    for its result. Backend errors degrade to computing locally; they never fail a request.
+    """
+
+    def __init__(self, client: Any, ttl: float, negative_ttl: float, lock_ttl: float, wait: float):
+        self.client = client
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock_ttl = lock_ttl
+        self.wait = wait
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    @staticmethod
+    def _name(key: Tuple[Any, ...]) -> str:
+        version, kind, resource = key[:3]
+        digest = hashlib.sha256(repr(key[3:]).encode("utf-8")).hexdigest()[:32]
+        return f"fbc:v{version}:{kind}:{resource}:{digest}"
+
+    def _read(self, name: str) -> Tuple[bool, Any]:
+        raw = self.client.get(name)
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    def _store(self, name: str, value: Any) -> None:
+        ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+        try:
+            self.client.set(name, app.json.dumps(value), px=int(ttl * 1000))
+        except Exception as e:
+            self._count("errors")
+            logger.warning("shared cache store failed: %s", e)
+
+    def get_or_compute(self, key: Tuple[Any, ...], compute: Callable[[], Any]) -> Any:
+        """
+        Returns the shared value for key, computing (at most once across instances) on a miss.
+        """
+        name = self._name(key)
+        try:
+            hit, value = self._read(name)
+            if hit:
+                self._count("hits")
+                return value
+            self._count("misses")
+            token = uuid.uuid4().hex
+            acquired = self.client.set(f"{name}:lock", token, nx=True, px=int(self.lock_ttl * 1000))
+        except Exception as e:
+            self._count("errors")
+            logger.warning("shared cache unavailable: %s", e)
+            return compute()
+
+        if not acquired:
+            # Another instance is computing this key; wait briefly for its result.
+            deadline = time.monotonic() + self.wait
+            while time.monotonic() < deadline:
+                time.sleep(0.025)
+                try:
+                    hit, value = self._read(name)
+                except Exception:
+                    break
+                if hit:
+                    self._count("coalesced")
+                    return value
+            return compute()
+
+        try:
+            value = compute()
+            self._store(name, value)
+            return value
+        finally:
+            try:
+                if self.client.get(f"{name}:lock") in (token, token.encode("ascii")):
+                    self.client.delete(f"{name}:lock")
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns counters for the admin stats route.
+        """
+        with self._lock:
+            return {
+                "backend": type(self.client).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+            }
+
+
+def _make_shared_cache() -> Optional[SharedCache]:
+    """
+    Builds the shared cache from REDIS_URL, or returns None when it is unset or unusable.
+    """
+    if not CACHE_ENABLED or not REDIS_URL:
+        return None
+    if REDIS_URL == "memory://":
+        client: Any = MemoryRedis()
+    else:
+        try:
+            import redis  # optional dependency
+        except ImportError:
+            logger.warning("REDIS_URL is set but the redis package is not installed; shared cache disabled")
+            return None
+        client = redis.Redis.from_url(REDIS_URL, socket_timeout=L2_SOCKET_TIMEOUT_SECS,
+                                      socket_connect_timeout=L2_SOCKET_TIMEOUT_SECS)
+    return SharedCache(client, L2_TTL_SECS, CACHE_NEGATIVE_TTL_SECS, L2_LOCK_TTL_SECS, L2_COALESCE_WAIT_SECS)
+
+
+shared_cache = _make_shared_cache()
+
+
+
+
+# ------------------------------------------------------------------------------
+# Data access
+# ------------------------------------------------------------------------------
+
+
+def fetch_one(resource: str, item_id: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Retrieves a single record by id from the specified resource table.
+    Returns a dictionary (restricted to fields, if given) if found, otherwise None.
+    In json_agg read mode the record is returned as pre-encoded RawJSON instead.
+    """
+    if READ_MODE == "json_agg":
+        sql = text(
+            f"SELECT {_json_object_sql(resource, fields)}::text FROM {_table_qualified(resource)} WHERE id = :item_id"
+        )
+        with get_engine().connect() as conn:
+            doc = conn.execute(sql, {"item_id": item_id}).scalar()
+        return RawJSON(doc) if doc is not None else None
+
+    sql = text(f"SELECT {_select_list(resource, fields)} FROM {_table_qualified(resource)} WHERE id = :item_id")
+    with get_engine().connect() as conn:
+        row = conn.execute(sql, {"item_id": item_id}).first()
+    return _rows_to_items([row], fields)[0] if row else None
+
+
+
+
+def fetch_many(resource: str, ids: List[str], fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Retrieves several records by id with one query.
+    Returns the found records in the requested order and the ids that were not found.
+    """
+    sql = text(f"SELECT {_select_list(resource, fields)} FROM {_table_qualified(resource)} WHERE id = ANY(:ids)")
+    with get_engine().connect() as conn:
+        rows = conn.execute(sql, {"ids": ids}).fetchall()
+    by_id = {str(item["id"]): item for item in _rows_to_items(rows, fields)}
+    items = [by_id[i] for i in ids if i in by_id]
+    missing = [i for i in ids if i not in by_id]
+    return items, missing
+
+
+
+
+def _parse_ids(raw: Any) -> List[str]:
+    """
+    Normalizes a comma-separated string or a JSON list of ids into unique, ordered strings.
+    Raises ValueError if a list entry is not a string or integer, or if the ids are empty
+    or exceed MAX_BATCH_SIZE.
+    """
+    if isinstance(raw, str):
+        values = raw.split(",")
+    elif isinstance(raw, list):
+        invalid = [f"[{i}] {json.dumps(v, default=str)}" for i, v in enumerate(raw)
+                   if not isinstance(v, (str, int)) or isinstance(v, bool)]
+        if invalid:
+            raise ValueError(f"ids must be strings or integers; invalid entries: {', '.join(invalid[:10])}.")
+        values = [str(v) for v in raw]
+    else:
+        raise ValueError("ids must be a comma-separated string or a JSON array.")
+    ids = list(dict.fromkeys(v.strip() for v in values if v.strip()))
+    if not ids:
+        raise ValueError("At least one id is required.")
+    if len(ids) > MAX_BATCH_SIZE:
+        raise ValueError(f"Requested {len(ids)} ids; the maximum per batch is {MAX_BATCH_SIZE}.")
+    return ids
+
+
+
+
+def fetch_list(resource: str, start: Optional[str], size: int,
+               filters: Dict[str, Any] = None, sort: List[str] = None,
+               fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str], bool]:
+    """
+    Retrieves a page of items using optional filtering, sorting, keyset pagination and projection.
+    Returns a list of dictionaries, the next_start cursor (or None) and a has_more flag.
+    """
+    n = _clamp_page_size(size)
+
+
+    filters = filters or {}
+    sort = sort or []
+
+
+    if READ_MODE == "json_agg":
+        return _fetch_list_json(resource, n, filters, sort, start, fields)
+
+
+    # Build WHERE, keyset seek and ORDER BY dynamically
+    stmt, params, order_keys = build_list_query(resource, n, filters, sort, start, fields)
+    with get_engine().connect() as conn:
+        rows = conn.execute(stmt, params).fetchall()
+
+
+    has_more = len(rows) > n
+    rows = rows[:n]
+    next_start = _encode_cursor(order_keys, _cursor_values(order_keys, rows[-1])) if has_more else None
+    items = _rows_to_items(rows, fields)
+    return items, next_start, has_more
+
+
+
+
+# to_char() pattern for the HTTP dates (IMF-fixdate) that the rows mode gets from Flask's
+# JSON provider, so json_agg responses format timestamps identically
+HTTP_DATE_PG_FORMAT = 'Dy, DD Mon YYYY HH24:MI:SS "GMT"'
+
+
+def _json_value_sql(col: str) -> str:
+    """
+    Renders a column as a json_build_object() value; timestamps become UTC HTTP dates.
+    """
+    if col in TIMESTAMP_COLUMNS:
+        return f"to_char(timezone('UTC', {col}), '{HTTP_DATE_PG_FORMAT}')"
+    return col
+
+
+def _json_object_sql(resource: str, fields: Optional[List[str]]) -> str:
+    """
+    Builds a json_build_object(...) expression over the projected columns, in projection order.
+    """
+    available = set(schema_catalog.columns(resource))
+    wanted = fields if fields is not None else RESOURCE_COLUMNS[resource]
+    return "json_build_object(" + ", ".join(f"'{col}', {_json_value_sql(col)}" for col in wanted if col in available) + ")"
+
+
+
+
+def _fetch_list_json(resource: str, n: int, filters: Dict[str, Any], sort: List[str], start: Optional[str],
+                     fields: Optional[List[str]]) -> Tuple[Any, Optional[str], bool]:
+    """
+    json_agg read mode: Postgres builds the finished items array (projection and order kept),
+    and the handler splices it into the envelope as RawJSON without decoding any row.
+    Timestamps are formatted as HTTP dates in SQL, matching the rows mode.
+    """
+    from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+    t = _table(resource)
+    order_keys = _order_keys(resource, sort)
+    doc = func.json_build_object(*(arg for col in _projection(resource, fields) for arg in (
+        literal_column(f"'{col}'"),
+        func.to_char(func.timezone(literal_column("'UTC'"), t.c[col]), literal_column(f"'{HTTP_DATE_PG_FORMAT}'"))
+        if col in TIMESTAMP_COLUMNS else t.c[col],
+    )))
+    page, params = _apply_filters_and_sort(resource, select(
+        doc.label("doc"),
+        func.json_build_array(*[t.c[col] for col, _ in order_keys]).label("sort_keys"),
+        func.row_number().over(order_by=_order_by(resource, order_keys)).label("ord"),
+    ), filters, order_keys, start)
+    page = page.limit(n + 1).subquery("p")
+    stmt = select(
+        cast(func.coalesce(func.json_agg(aggregate_order_by(page.c.doc, page.c.ord)).filter(page.c.ord <= n),
+                           literal_column("'[]'::json")), Text).label("items"),
+        func.count().label("fetched"),
+        func.min(cast(page.c.sort_keys, Text)).filter(page.c.ord == n).label("last_keys"),
+    )
+    with get_engine().connect() as conn:
+        row = conn.execute(stmt, params).one()
+
+
+    has_more = row.fetched > n
+    next_start = _encode_cursor(order_keys, json.loads(row.last_keys)) if has_more else None
+    return RawJSON(row.items), next_start, has_more
+
+
+
+
+def _clamp_page_size(size: Optional[int]) -> int:
+    """
+    Clamps the page size to [1, MAX_PAGE_SIZE]. Raises ValueError on overflow.
+    """
+    n = MAX_PAGE_SIZE if size is None else int(size)
+    if n < 1:
+        n = 1
+    if n > MAX_PAGE_SIZE:
+        raise ValueError(f"Requested size exceeds maximum ({MAX_PAGE_SIZE}).")
+    return n
+
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def count_rows(resource: str, filters: Dict[str, Any], mode: str) -> Dict[str, Any]:
+    """
+    Counts the rows matching filters (ignoring paging) as {"count": n, "accuracy": ...}.
+      - exact: counts at most COUNT_EXACT_CAP rows; beyond that the count is the cap and
+        accuracy is "lower_bound"
+      - estimate: pg_class.reltuples for an unfiltered table, else the planner's row
+        estimate for the filtered query; nothing is scanned either way
+    """
+    table = _table_qualified(resource)
+    matching, params = _apply_filters_and_sort(resource, select(literal_column("1")).select_from(_table(resource)), filters)
+
+    with get_engine().connect() as conn:
+        if mode == "exact":
+            capped = matching.limit(COUNT_EXACT_CAP + 1).subquery("capped")
+            n = conn.execute(select(func.count()).select_from(capped), params).scalar_one()
+            if n > COUNT_EXACT_CAP:
+                return {"count": COUNT_EXACT_CAP, "accuracy": "lower_bound"}
+            return {"count": n, "accuracy": "exact"}
+
+        if not params:
+            # reltuples is -1 until the table is first vacuumed/analyzed; fall back to the planner then
+            n = conn.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"), {"table": table}
+            ).scalar()
+            if n is not None and n >= 0:
+                return {"count": n, "accuracy": "estimate"}
+        plan = conn.execute(Explain(matching), params).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return {"count": int(plan[0]["Plan"]["Plan Rows"]), "accuracy": "estimate"}
+
+
+
+
+# ------------------------------------------------------------------------------
+# Keyset pagination cursors
+# ------------------------------------------------------------------------------
+
+
+# Mirrors the loader's ID_NUM_SQL: ids of up to 18 digits as bigints, every other id at the
+# bigint maximum, so id_num is NOT NULL and (id_num, id) is a total, index-backed order.
+NON_NUMERIC_ID_NUM = 2 ** 63 - 1
+_NUMERIC_ID_RE = re.compile(r"[0-9]{1,18}")
+
+# Trailing keys of every sort; both are NOT NULL and share the (id_num, id) index.
+TIEBREAK_KEYS = ("id_num", "id")
+DEFAULT_ORDER_KEYS = tuple((col, "ASC") for col in TIEBREAK_KEYS)
+
+
+def _id_num(item_id: str) -> int:
+    """
+    Returns the id_num the loader stores for item_id.
+    """
+    return int(item_id) if _NUMERIC_ID_RE.fullmatch(item_id) else NON_NUMERIC_ID_NUM
+
+
+def _cursor_values(order_keys: List[Tuple[str, str]], row: Row) -> List[Any]:
+    """
+    Extracts the sort tuple of a row. id_num is derived from id, so it never has to be selected.
+    """
+    mapping = row._mapping
+    return [_id_num(mapping["id"]) if col == "id_num" else mapping[col] for col, _ in order_keys]
+
+
+
+
+def _encode_cursor(order_keys: List[Tuple[str, str]], values: List[Any]) -> str:
+    """
+    Encodes the sort tuple of the last row on a page as an opaque, URL-safe cursor.
+    The sort signature is embedded so a cursor cannot be replayed against another sort.
+    """
+    body = {
+        "s": [f"{col} {direction}" for col, direction in order_keys],
+        "v": values,
+    }
+    raw = json.dumps(body, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+
+
+def _decode_cursor(token: str, order_keys: List[Tuple[str, str]]) -> List[Any]:
+    """
+    Decodes a cursor produced by _encode_cursor. Raises ValueError if it is malformed
+    or was issued for a different sort order.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        body = json.loads(raw)
+        values = body["v"]
+        signature = body["s"]
+    except (ValueError, TypeError, KeyError):
+        raise ValueError("Query parameter 'start' is not a valid pagination cursor.")
+    if signature != [f"{col} {direction}" for col, direction in order_keys] or len(values) != len(order_keys):
+        raise ValueError("Pagination cursor does not match the requested sort order.")
+    return values
+
+
+
+
+# ------------------------------------------------------------------------------
+# Query builder (SQLAlchemy Core)
+# ------------------------------------------------------------------------------
+# List, export, count and facet queries are Core statements over Table objects built
+# from RESOURCE_COLUMNS. Filter and sort names are checked against those columns before
+# any database I/O, values are always bound, and the engine's compiled-statement cache
+# (keyed by statement shape) skips recompiling SQL for every repeat of a shape.
+
+
+def _like_escape(val: str) -> str:
+    """
+    Escapes LIKE wildcards so user input matches literally.
+    """
+    return val.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _normalize_zipcode(val: str) -> str:
+    """
+    Mirrors the loader's zipcode_norm: alphanumerics only, upper-cased.
+    """
+    return "".join(ch for ch in val if ch.isalnum()).upper()
+
+
+
+SORT_MAPPING: Dict[str, Tuple[str, str]] = {
+    "name_asc": ("name", "ASC"),
+    "name_desc": ("name", "DESC"),
+    "urgency_high": ("urgency", "DESC"),
+    "urgency_low": ("urgency", "ASC"),
+}
+
+# Column types the builder needs beyond plain text. Mirrors the ORM models in fbc-load-db/main.py.
+JSONB_COLUMNS = frozenset({"languages", "open_hours", "services", "links", "contact", "media"})
+TIMESTAMP_COLUMNS = frozenset({"fetched_at", "created_at"})
+
+# Filterable columns per resource: every text column, plus languages (JSON containment).
+FILTER_COLUMNS: Dict[str, frozenset] = {
+    resource: frozenset(c for c in columns if c == "languages" or c not in JSONB_COLUMNS | TIMESTAMP_COLUMNS)
+    for resource, columns in RESOURCE_COLUMNS.items()
+}
+EXACT_FILTER_COLUMNS = frozenset({"city", "state", "eligibility", "urgency"})
+
+_metadata = MetaData()
+
+
+@lru_cache(maxsize=None)
+def _table(name: str) -> Table:
+    """
+    Returns the Core Table for a resource (its public columns plus the loader's id_num,
+    search_doc and zipcode_norm helpers) or for facet_counts. The Postgres types are
+    imported here so the dialect loads with the first query rather than at cold start.
+    """
+    from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+
+    if name == "facet_counts":
+        return Table(name, _metadata, Column("resource", String), Column("field", String),
+                     Column("value", String), Column("count", BigInteger), schema=SCHEMA)
+    columns = [
+        Column(c, JSONB if c in JSONB_COLUMNS else TIMESTAMP(timezone=True) if c in TIMESTAMP_COLUMNS else String)
+        for c in RESOURCE_COLUMNS[name]
+    ]
+    columns += [Column("id_num", BigInteger), Column("search_doc", TSVECTOR)]
+    if name == "foodbanks":
+        columns.append(Column("zipcode_norm", String))
+    return Table(name, _metadata, *columns, schema=SCHEMA)
+
+
+def _bind_filters(resource: str, filters: Dict[str, Any]) -> Tuple[Tuple[str, ...], Dict[str, Any]]:
+    """
+    Validates filters and returns the active filter columns (in name order) with their bind
+    values, one f_<column> param each. Empty, whitespace-only and "all"/"any" values are
+    skipped. Raises ValueError on names that are not filterable columns of the resource,
+    before any I/O.
+    """
+    unknown = sorted(col for col in filters if col != "search" and col not in FILTER_COLUMNS[resource])
+    if unknown:
+        raise ValueError(f"Unknown filter field(s) for {resource}: {', '.join(unknown)}. "
+                         f"Allowed: search, {', '.join(sorted(FILTER_COLUMNS[resource]))}.")
+
+    columns, params = [], {}
+    for col, val in sorted(filters.items()):
+        val = str(val).strip() if val is not None else ""
+        if not val or val.lower() in ["all", "any"]:
+            continue  # skip empty, whitespace-only or "All" filters
+        if col == "languages":
+            val = [val]
+        elif col == "zipcode":
+            val = f"{_normalize_zipcode(val)}%"
+        elif col != "search" and col not in EXACT_FILTER_COLUMNS:
+            val = f"%{_like_escape(val)}%"
+        columns.append(col)
+        params[f"f_{col}"] = val
+    return tuple(columns), params
+
+
+def _filter_conditions(resource: str, columns: Tuple[str, ...]) -> List[ColumnElement]:
+    """
+    Renders active filter columns as Core conditions bound to the f_<column> params:
+      - Full-text search via the `search` key (GIN-indexed search_doc)
+      - Exact match: city, state, eligibility, urgency (btree-indexed)
+      - ZIP prefix match: zipcode
+      - JSON containment: languages
+      - Substring match on any other text column
+    """
+    t = _table(resource)
+    conditions: List[ColumnElement] = []
+    for col in columns:
+        value = bindparam(f"f_{col}")
+        if col == "search":
+            query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'"), value)
+            conditions.append(t.c.search_doc.bool_op("@@")(query))
+        elif col == "languages":
+            conditions.append(t.c.languages.contains(value))
+        elif col == "zipcode":
+            # Prefix match on the loader-normalized column (text_pattern_ops index)
+            conditions.append(t.c.zipcode_norm.like(value))
+        elif col in EXACT_FILTER_COLUMNS:
+            conditions.append(t.c[col] == value)
+        else:
+            # Substring match; served by the pg_trgm GIN indexes on free-text columns
+            conditions.append(t.c[col].ilike(value))
+    return conditions
+
+
+def _order_keys(resource: str, sort: List[str]) -> Tuple[Tuple[str, str], ...]:
+    """
+    Resolves sort values (frontend-friendly names or raw [-]column names) into ordered
+    (column, direction) keys. Every sort ends with TIEBREAK_KEYS: numeric ids first in
+    numeric order, then the rest by id, which is unique, so the order is total and seekable.
+    Raises ValueError on columns the resource does not have.
+    """
+    order_keys: List[Tuple[str, str]] = []
+    for s in sort:
+        if s in SORT_MAPPING:
+            col_name, direction = SORT_MAPPING[s]
+        else:
+            # Handle raw sort values from frontend: sort=name / sort=-name
+            direction = "DESC" if s.startswith("-") else "ASC"
+            col_name = s.lstrip("-")
+        if col_name in ("id", "id_num"):
+            id_direction = direction
+            break  # id is unique, so any later keys could never be reached
+        if col_name not in RESOURCE_COLUMNS[resource]:
+            raise ValueError(f"Invalid sort field: {s!r}.")
+        order_keys.append((col_name, direction))
+    else:
+        id_direction = "ASC"
+    order_keys += [(col, id_direction) for col in TIEBREAK_KEYS]
+    return tuple(order_keys)
+
+
+def _order_by(resource: str, order_keys: Tuple[Tuple[str, str], ...]) -> List[ColumnElement]:
+    """
+    Renders (column, direction) keys as ORDER BY terms; every nullable key sorts NULLS LAST.
+    The NOT NULL tiebreak keys keep the plain direction, which matches their index.
+    """
+    t = _table(resource)
+    terms = []
+    for col, direction in order_keys:
+        term = t.c[col].desc() if direction == "DESC" else t.c[col].asc()
+        terms.append(term if col in TIEBREAK_KEYS else term.nulls_last())
+    return terms
+
+
+def _bind_seek(order_keys: Tuple[Tuple[str, str], ...], start: Optional[str]) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Decodes the start cursor into a seek shape and its k<i> bind values. The shape is None
+    (first page), "id" (legacy numeric start id) or, for an opaque cursor, which values of the
+    user's sort keys are NULL (the tiebreak keys never are). Raises ValueError on a malformed
+    cursor or one issued for another sort, and on a numeric start with a non-default sort or
+    outside the numeric id range.
+    """
+    if not start:
+        return None, {}
+    if start.isascii() and start.isdigit():
+        # A numeric start is a position in the default id order only
+        if order_keys != DEFAULT_ORDER_KEYS:
+            raise ValueError("Query parameter 'start' must be a pagination cursor when 'sort' is given.")
+        if len(start.lstrip("0")) > 18:
+            raise ValueError("Query parameter 'start' is out of range.")
+        return "id", {"k0": int(start)}
+    values = _decode_cursor(start, list(order_keys))
+    if any(v is None for v in values[-len(TIEBREAK_KEYS):]):
+        raise ValueError("Query parameter 'start' is not a valid pagination cursor.")
+    nulls = tuple(v is None for v in values[:-len(TIEBREAK_KEYS)])
+    return nulls, {f"k{i}": v for i, v in enumerate(values) if v is not None}
+
+
+def _keyset_condition(resource: str, order_keys: Tuple[Tuple[str, str], ...], nulls: Tuple[bool, ...]) -> ColumnElement:
+    """
+    Builds the row-after-cursor predicate for an ORDER BY where every sort key sorts NULLS LAST:
+      (k1 after v1) OR (k1 = v1 AND k2 after v2) OR ... OR (k1 = v1 AND ... AND (id_num, id) > (vN-1, vN))
+    The tiebreak keys are NOT NULL and compared as one row value, so the default sort's
+    predicate is a single range condition Postgres seeks on the (id_num, id) index.
+    """
+    t = _table(resource)
+    disjuncts = []
+    equalities: List[ColumnElement] = []
+    sort_keys = len(order_keys) - len(TIEBREAK_KEYS)
+    for i, ((col, direction), is_null) in enumerate(zip(order_keys[:sort_keys], nulls)):
+        c = t.c[col]
+        if is_null:
+            # Already inside the NULL tail of this key: nothing sorts strictly after it.
+            equalities.append(c.is_(None))
+            continue
+        value = bindparam(f"k{i}")
+        disjuncts.append(and_(*equalities, or_(c < value if direction == "DESC" else c > value, c.is_(None))))
+        equalities.append(c == value)
+    tiebreak = tuple_(t.c.id_num, t.c.id)
+    cursor = tuple_(bindparam(f"k{sort_keys}", type_=BigInteger), bindparam(f"k{sort_keys + 1}", type_=String))
+    disjuncts.append(and_(*equalities, tiebreak < cursor if order_keys[-1][1] == "DESC" else tiebreak > cursor))
+    return or_(*disjuncts)
+
+
+@lru_cache(maxsize=QUERY_SHAPE_CACHE_SIZE)
+def _criteria(resource: str, filter_columns: Tuple[str, ...], order_keys: Tuple[Tuple[str, str], ...],
+              seek: Any) -> Tuple[Tuple[ColumnElement, ...], Tuple[ColumnElement, ...]]:
+    """
+    Returns the WHERE conditions and ORDER BY terms of one query shape, built once per shape.
+    """
+    conditions = _filter_conditions(resource, filter_columns)
+    if seek == "id":
+        # Legacy numeric start: inclusive seek on the id; non-numeric ids sort after every numeric one
+        conditions.append(_table(resource).c.id_num >= bindparam("k0"))
+    elif seek is not None:
+        conditions.append(_keyset_condition(resource, order_keys, seek))
+    return tuple(conditions), tuple(_order_by(resource, order_keys))
+
+
+def _validate_filters_and_sort(resource: str, filters: Dict[str, Any], sort: List[str]) -> None:
+    """
+    Raises ValueError for unknown filter or sort fields; lets handlers answer 400 before any I/O.
+    """
+    _bind_filters(resource, filters)
+    _order_keys(resource, sort)
+
+
+def _apply_filters_and_sort(resource: str, stmt: Select, filters: Dict[str, Any],
+                            order_keys: Tuple[Tuple[str, str], ...] = (),
+                            start: Optional[str] = None) -> Tuple[Select, Dict[str, Any]]:
+    """
+    Adds filtering, keyset pagination and ORDER BY to a SELECT over the resource table.
+    Supports:
+      - The filters of _filter_conditions (including text search via the `search` key)
+      - The (column, direction) keys of _order_keys (none: no ORDER BY)
+      - Keyset pagination via an opaque `start` cursor (or a legacy numeric start id)
+    Returns the statement and its bind params. Values are never rendered into the SQL, so
+    each shape compiles once and then hits the engine's compiled-statement cache.
+    Raises ValueError on unknown fields or a bad cursor.
+    """
+    filter_columns, params = _bind_filters(resource, filters)
+    seek, seek_params = _bind_seek(order_keys, start)
+    params.update(seek_params)
+    where, order_by = _criteria(resource, filter_columns, order_keys, seek)
+    return stmt.where(*where).order_by(*order_by), params
+
+
+@lru_cache(maxsize=QUERY_SHAPE_CACHE_SIZE)
+def _list_statement(resource: str, filter_columns: Tuple[str, ...], order_keys: Tuple[Tuple[str, str], ...],
+                    seek: Any, columns: Tuple[str, ...]) -> Select:
+    """
+    Returns the rows-mode list SELECT for one shape. Reusing the same statement object keeps
+    its (memoized) cache key, so repeat requests skip building and compiling entirely.
+    """
+    t = _table(resource)
+    where, order_by = _criteria(resource, filter_columns, order_keys, seek)
+    return select(*[t.c[c] for c in columns]).where(*where).order_by(*order_by).limit(bindparam("n"))
+
+
+def build_list_query(resource: str, n: int, filters: Dict[str, Any], sort: List[str], start: Optional[str],
+                     fields: Optional[List[str]]) -> Tuple[Select, Dict[str, Any], Tuple[Tuple[str, str], ...]]:
+    """
+    Returns the rows-mode list query (one extra row past n), its bind params and its order keys.
+    """
+    order_keys = _order_keys(resource, sort)
+    filter_columns, params = _bind_filters(resource, filters)
+    seek, seek_params = _bind_seek(order_keys, start)
+    # Sort keys are always selected so the cursor can be built from the last row
+    columns = tuple(_projection(resource, fields, extra=[col for col, _ in order_keys if col not in INTERNAL_COLUMNS]))
+    # Fetch one extra row to learn whether another page exists
+    params.update(seek_params, n=n + 1)
+    return _list_statement(resource, filter_columns, order_keys, seek, columns), params, order_keys
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN (FORMAT JSON) of a Core statement: planner estimates only, nothing is executed.
+    """
+    inherit_cache = True
+    _traverse_internals = [("statement", InternalTraversal.dp_clauseelement)]
+
+    def __init__(self, statement: Select) -> None:
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element: Explain, compiler, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+
+
+# ------------------------------------------------------------------------------
+# Facets (value -> count maps for filter dropdowns)
+# ------------------------------------------------------------------------------
+# The loader precomputes unfiltered counts into facet_counts on every load, so the
+# common request is one primary-key range read. With filters active, each field is
+# counted live under every filter except its own, so a dropdown still lists the
+# alternatives to its current selection.
+
+
+# Facet fields per resource. Mirrors FACET_COLUMNS in fbc-load-db/main.py, which fills
+# facet_counts with the same per-row values _facet_source() counts; update both together.
+FACET_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "foodbanks": ("city", "eligibility", "urgency", "languages", "zipcode"),
+    "programs": ("eligibility", "program_type"),
+    "sponsors": ("city", "affiliation"),
+}
+JSONB_FACET_COLUMNS = frozenset({"languages"})
+
+
+def _resolve_facet_fields(resource: str, raw: Optional[str]) -> List[str]:
+    """
+    Parses fields= for the facets endpoint (default: every facet of the resource).
+    Raises ValueError on names that are not facets.
+    """
+    allowed = FACET_COLUMNS[resource]
+    if not raw:
+        return list(allowed)
+    fields = list(dict.fromkeys(t.strip() for t in raw.split(",") if t.strip()))
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown facet(s) for {resource}: {', '.join(unknown)}. Allowed: {', '.join(allowed)}.")
+    return fields
+
+
+def _facet_source(resource: str, field: str) -> Tuple[ColumnElement, Any]:
+    """
+    Returns (value expression, FROM clause) for a facet. zipcode counts the 5-character prefix
+    of zipcode_norm (what the prefix filter matches); JSONB arrays are unnested laterally so
+    each element counts once per row.
+    """
+    t = _table(resource)
+    if field in JSONB_FACET_COLUMNS:
+        elements = func.jsonb_array_elements_text(
+            case((func.jsonb_typeof(t.c[field]) == "array", t.c[field]), else_=literal_column("'[]'::jsonb"))
+        ).table_valued("value").lateral("facet")
+        return elements.c.value, t.join(elements, true())
+    if field == "zipcode":
+        return func.left(t.c.zipcode_norm, literal_column("5")), t
+    return t.c[field], t
+
+
+def _fetch_facets_precomputed(resource: str, fields: List[str]) -> Optional[Dict[str, Dict[str, int]]]:
+    """
+    Reads unfiltered counts from the loader's facet_counts table.
+    Returns None when the table is missing or has nothing for this resource (older loader).
+    """
+    fc = _table("facet_counts")
+    stmt = (
+        select(fc.c.field, fc.c.value, fc.c.count)
+        .where(fc.c.resource == resource, fc.c.field.in_(fields))
+        .order_by(fc.c.field, fc.c.count.desc(), fc.c.value)
+    )
+    try:
+        with get_engine().connect() as conn:
+            rows = conn.execute(stmt).fetchall()
+    except ProgrammingError as e:
+        logger.warning("facet_counts unavailable, counting live: %s", e.__cause__ or e)
+        return None
+    if not rows:
+        return None
+    facets: Dict[str, Dict[str, int]] = {f: {} for f in fields}
+    for field, value, count in rows:
+        if len(facets[field]) < FACET_LIMIT:
+            facets[field][value] = count
+    return facets
+
+
+def fetch_facets(resource: str, fields: List[str], filters: Dict[str, Any]) -> Dict[str, Dict[str, int]]:
+    """
+    Returns {field: {value: count}} (most frequent first, at most FACET_LIMIT values per field)
+    for rows matching the filters, ignoring each field's own filter.
+    """
+    active = {k: v for k, v in filters.items() if v and str(v).strip().lower() not in ("all", "any")}
+    if not active:
+        facets = _fetch_facets_precomputed(resource, fields)
+        if facets is not None:
+            return facets
+
+    # every facet binds the same f_<column> params, so one params dict serves the whole UNION
+    filter_columns, params = _bind_filters(resource, active)
+    selects = []
+    for field in fields:
+        value, source = _facet_source(resource, field)
+        others = _filter_conditions(resource, tuple(c for c in filter_columns if c != field))
+        selects.append(
+            select(cast(literal(field), Text).label("field"), value.label("value"), func.count().label("count"))
+            .select_from(source)
+            .where(value.is_not(None), value != "", *others)
+            .group_by(value)
+            .order_by(func.count().desc(), value)
+            .limit(FACET_LIMIT)
+        )
+
+    facets = {f: {} for f in fields}
+    with get_engine().connect() as conn:
+        for field, value, count in conn.execute(union_all(*selects), params):
+            facets[field][value] = count
+    return facets
+
+
+
+
+# ------------------------------------------------------------------------------
+# Metrics (Prometheus text exposition; /metrics or pushed to a Pushgateway)
+# ------------------------------------------------------------------------------
+# Everything is in-process and dependency-free. Long-running servers are scraped
+# at /metrics; Lambda containers, which cannot be scraped, push the same text to
+# METRICS_PUSH_URL at most every METRICS_PUSH_INTERVAL_SECS, grouped by instance.
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def _label_value(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names: Tuple[str, ...], values: Tuple[Any, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_label_value(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """
+    Monotonic counter keyed by label values.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> None:
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values: Dict[Tuple[Any, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: Any, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_label_str(self.labels, k)} {v}" for k, v in self._values.items()]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram keyed by label values.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self._values: Dict[Tuple[Any, ...], List[float]] = {}  # bucket counts..., +Inf count, sum
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: Any) -> None:
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        out = []
+        for key, series in items:
+            bounds = [str(b) for b in self.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, series):
+                le = 'le="' + bound + '"'
+                out.append(f"{self.name}_bucket{_label_str(self.labels, key, le)} {count}")
+            out.append(f"{self.name}_count{_label_str(self.labels, key)} {series[-2]}")
+            out.append(f"{self.name}_sum{_label_str(self.labels, key)} {series[-1]}")
+        return out
+
+
+class MetricsRegistry:
+    """
+    Holds the metrics and renders them in the Prometheus text format (version 0.0.4).
+    Collectors are callables returning (name, kind, help, samples) for values read at scrape time.
+    """
+
+    def __init__(self) -> None:
+        self.metrics: List[Any] = []
+        self.collectors: List[Callable[[], List[Tuple[str, str, str, List[str]]]]] = []
+
+    def counter(self, *args: Any, **kwargs: Any) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args: Any, **kwargs: Any) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        families = [(m.name, m.kind, m.help, m.samples()) for m in self.metrics]
+        for collect in self.collectors:
+            families.extend(collect())
+        lines = []
+        for name, kind, help_text, samples in families:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram(
+    "fbc_http_request_duration_seconds", "Request latency by route and resource.",
+    ("route", "resource", "method", "status"))
+DB_SECONDS = metrics.histogram(
+    "fbc_db_duration_seconds", "Time spent executing SQL per request.", ("route", "resource"))
+SERIALIZE_SECONDS = metrics.histogram(
+    "fbc_serialization_duration_seconds", "Time spent encoding JSON responses per request.", ("route", "resource"))
+ROWS_TOTAL = metrics.counter(
+    "fbc_db_rows_total", "Rows returned by the database.", ("route", "resource"))
+RESPONSE_BYTES = metrics.histogram(
+    "fbc_http_response_bytes", "Response body size as sent (after compression).", ("route", "resource"),
+    buckets=BYTES_BUCKETS)
+CACHE_TOTAL = metrics.counter(
+    "fbc_cache_requests_total", "Cached lookups by outcome (l1_hit, l2_hit, miss).", ("result",))
+ERRORS_TOTAL = metrics.counter(
+    "fbc_http_errors_total", "Error responses by json_error code.", ("code", "status"))
+POOL_WAIT_SECONDS = metrics.histogram(
+    "fbc_db_pool_checkout_wait_seconds", "Time waiting for a pooled connection, including connects.")
+
+
+def _collect_pool() -> List[Tuple[str, str, str, List[str]]]:
+    stats = pool_telemetry.stats(_engine.pool if _engine is not None else None)
+    families = [("fbc_db_pool_connects_total", "counter", "New database connections.",
+                 [f"fbc_db_pool_connects_total {stats['connects']}"])]
+    for key in ("size", "checked_out", "checked_in", "overflow"):
+        if key in stats:
+            name = f"fbc_db_pool_{key}"
+            families.append((name, "gauge", f"Connection pool {key.replace('_', ' ')}.", [f"{name} {stats[key]}"]))
+    return families
+
+
+def _collect_compression() -> List[Tuple[str, str, str, List[str]]]:
+    encodings = compression_stats()["encodings"]
+    return [("fbc_compression_bytes_saved_total", "counter", "Bytes saved by response compression.",
+             [f'fbc_compression_bytes_saved_total{{encoding="{enc}"}} {s["bytes_saved"]}'
+              for enc, s in encodings.items()])]
+
+
+metrics.collectors.extend([_collect_pool, _collect_compression])
+
+
+
+
+def _record_phase(name: str, seconds: float) -> None:
+    """
+    Adds seconds to the current request's named phase total (no-op outside a request).
+    """
+    if has_request_context():
+        phases = g.setdefault("phases", {})
+        phases[name] = phases.get(name, 0.0) + seconds
+
+
+@contextmanager
+def _phase(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_phase(name, time.perf_counter() - t0)
+
+
+
+
+SERVER_TIMING_PHASES = (
+    ("table", "Table check"),
+    ("checkout", "Connection checkout"),
+    ("sql", "SQL execution"),
+    ("map", "Row mapping"),
+    ("score", "Scoring"),
+    ("serialize", "Serialization"),
+    ("compress", "Compression"),
+)
+
+
+
+
+def _server_timing() -> str:
+    """
+    Renders the request's recorded phases, plus the running total, as a Server-Timing value (ms).
+    Phases can nest: a table check that reloads the schema catalog also counts checkout and SQL.
+    """
+    phases = g.get("phases", {})
+    parts = [f'{name};desc="{desc}";dur={phases[name] * 1e3:.2f}'
+             for name, desc in SERVER_TIMING_PHASES if name in phases]
+    started = g.get("started_at")
+    if started is not None:
+        parts.append(f'total;dur={(time.perf_counter() - started) * 1e3:.2f}')
+    return ", ".join(parts)
+
+
+
+
+def _metric_labels() -> Tuple[str, str]:
+    """
+    Low-cardinality (route, resource) labels for the current request.
+    """
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    resource = (request.view_args or {}).get("resource", "")
+    if resource and resource not in ALLOWED_TYPES:
+        resource = "other"
+    return route, resource
+
+
+
+
+def _record_request_metrics(resp) -> None:
+    """
+    Records latency, DB/serialization time, rows, bytes and error codes for the finished request.
+    """
+    route, resource = _metric_labels()
+    started = g.get("started_at")
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route, resource, request.method, resp.status_code)
+    phases = g.get("phases", {})
+    DB_SECONDS.observe(phases.get("sql", 0.0), route, resource)
+    if "serialize" in phases:
+        SERIALIZE_SECONDS.observe(phases["serialize"], route, resource)
+    if g.get("rows"):
+        ROWS_TOTAL.inc(route, resource, amount=g.rows)
+    length = resp.calculate_content_length()
+    if length is not None:
+        RESPONSE_BYTES.observe(length, route, resource)
+    if g.get("error_code"):
+        ERRORS_TOTAL.inc(g.error_code, resp.status_code)
+
+
+
+
+_push_state = {"last": 0.0, "instance": uuid.uuid4().hex[:12]}
+
+
+
+
+def _maybe_push_metrics() -> None:
+    """
+    Pushes the registry to METRICS_PUSH_URL (a Prometheus Pushgateway) when the push
+    interval has elapsed. Used by the Lambda entrypoints; failures are logged, never raised.
+    """
+    if not METRICS_PUSH_URL or time.monotonic() - _push_state["last"] < METRICS_PUSH_INTERVAL_SECS:
+        return
+    _push_state["last"] = time.monotonic()
+    import urllib.request
+
+    url = f"{METRICS_PUSH_URL.rstrip('/')}/metrics/job/{METRICS_JOB}/instance/{_push_state['instance']}"
+    req = urllib.request.Request(url, data=metrics.render().encode("utf-8"), method="PUT",
+                                 headers={"Content-Type": "text/plain; version=0.0.4"})
+    try:
+        urllib.request.urlopen(req, timeout=METRICS_PUSH_TIMEOUT_SECS).close()
+    except Exception as e:
+        logger.warning("metrics push to %s failed: %s", url, e)
+
+
+
+
+# ------------------------------------------------------------------------------
+# Slow-query log (fingerprints, latency, sampled EXPLAIN ANALYZE plans)
+# ------------------------------------------------------------------------------
+# Every statement is reduced to a fingerprint (literals and bind markers folded,
+# whitespace collapsed) with call/latency totals. Statements slower than
+# SLOW_QUERY_MS are, at EXPLAIN_SAMPLE_RATE and at most once per fingerprint per
+# EXPLAIN_COOLDOWN_SECS, re-run under EXPLAIN (ANALYZE, BUFFERS) on a background
+# thread; the plans land in a ring buffer served by /admin/slow-queries.
+
+
+_FP_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|(?<![:\w]):\w+|\$\d+")
+_FP_SPACES = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def _fingerprint(statement: str) -> Tuple[str, str]:
+    """
+    Returns (fingerprint id, normalized statement) for a SQL string.
+    """
+    normalized = _FP_SPACES.sub(" ", _FP_LITERALS.sub("?", statement)).strip()
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16], normalized
+
+
+class QueryLog:
+    """
+    Per-fingerprint latency totals (bounded, least recently seen evicted first) plus a
+    ring buffer of sampled slow-query plans.
+    """
+
+    def __init__(self, max_fingerprints: int, max_plans: int) -> None:
+        self.max_fingerprints = max_fingerprints
+        self._stats: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._plans: Deque[Dict[str, Any]] = deque(maxlen=max_plans)
+        self._explained_at: Dict[str, float] = {}
+        self._pending: "queue.SimpleQueue[Tuple[str, str, Any, float]]" = queue.SimpleQueue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, parameters: Any, elapsed: float) -> None:
+        if statement.lstrip()[:7].upper() == "EXPLAIN":
+            return
+        fp, normalized = _fingerprint(statement)
+        ms = elapsed * 1e3
+        slow = ms >= SLOW_QUERY_MS
+        with self._lock:
+            entry = self._stats.get(fp)
+            if entry is None:
+                entry = self._stats[fp] = {"fingerprint": fp, "statement": normalized, "calls": 0,
+                                           "slow_calls": 0, "total_ms": 0.0, "max_ms": 0.0}
+                if len(self._stats) > self.max_fingerprints:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(fp)
+            entry["calls"] += 1
+            entry["total_ms"] += ms
+            entry["max_ms"] = max(entry["max_ms"], ms)
+            entry["last_seen"] = time.time()
+            if not slow:
+                return
+            entry["slow_calls"] += 1
+            now = time.monotonic()
+            if (not _sampled(EXPLAIN_SAMPLE_RATE)
+                    or now - self._explained_at.get(fp, -EXPLAIN_COOLDOWN_SECS) < EXPLAIN_COOLDOWN_SECS
+                    or statement.lstrip().split(None, 1)[0].upper() not in ("SELECT", "WITH")):
+                return
+            self._explained_at[fp] = now
+        self._pending.put((fp, statement, parameters, ms))
+        self._ensure_worker()
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._explain_loop, name="fbc-explain", daemon=True)
+                self._worker.start()
+
+    def _explain_loop(self) -> None:
+        while True:
+            fp, statement, parameters, ms = self._pending.get()
+            try:
+                with get_engine().connect() as conn:
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(EXPLAIN_TIMEOUT_MS)}")
+                    lines = conn.exec_driver_sql(
+                        "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters or {}
+                    ).scalars().all()
+                    conn.rollback()
+                plan = "\n".join(lines)
+            except Exception as e:
+                plan = None
+                logger.warning("EXPLAIN for fingerprint %s failed: %s", fp, e)
+            with self._lock:
+                self._plans.append({"fingerprint": fp, "observed_ms": round(ms, 3), "plan": plan,
+                                    "params": repr(parameters)[:500], "captured_at": time.time()})
+
+    def worst(self, limit: int, order: str) -> List[Dict[str, Any]]:
+        """
+        Top fingerprints by total_ms, max_ms or mean_ms, each with its captured plans (newest first).
+        """
+        with self._lock:
+            entries = [{**e, "mean_ms": e["total_ms"] / e["calls"]} for e in self._stats.values()]
+            plans = list(self._plans)
+        entries.sort(key=lambda e: e[order], reverse=True)
+        out = []
+        for e in entries[:limit]:
+            e["total_ms"], e["max_ms"], e["mean_ms"] = (round(e[k], 3) for k in ("total_ms", "max_ms", "mean_ms"))
+            e["plans"] = [p for p in reversed(plans) if p["fingerprint"] == e["fingerprint"]]
+            out.append(e)
+        return out
+
+
+query_log = QueryLog(QUERY_LOG_MAX_FINGERPRINTS, SLOW_PLAN_BUFFER)
+
+
+
+
+# ------------------------------------------------------------------------------
+# Request logging
+# ------------------------------------------------------------------------------
+
+
+@app.before_request
+def _assign_request_id_and_log():
+    """
+    Assigns a per-request id, starts the request clock and decides whether this request's
+    access and SQL lines are sampled (the access line itself is written in _after).
+    """
+    g.started_at = time.perf_counter()
+    _request_id()
+    g.log_access = _sampled(ACCESS_LOG_SAMPLE_RATE)
+    g.log_sql = _sampled(SQL_LOG_SAMPLE_RATE)
+    if _tracer is not None:
+        _start_request_span()
+
+
+
+
+@app.after_request
+def _after(resp):
+    """
+    Adds request id header to all responses, HTTP caching headers to public GETs,
+    compresses bodies the client accepts an encoding for, adds Server-Timing (when enabled),
+    records request metrics and writes the (sampled) access log line.
+    """
+    resp.headers["X-Request-Id"] = _request_id()
+    if g.get("profile_file"):
+        resp.headers["X-Profile"] = g.profile_file
+    encoding = _negotiate_encoding(resp)
+    if request.method in ("GET", "HEAD") and request.path.startswith("/v1/"):
+        resp = _apply_http_caching(resp, encoding)
+    if encoding and resp.status_code == 200:
+        _compress(resp, encoding)
+    if SERVER_TIMING_ENABLED:
+        resp.headers["Server-Timing"] = _server_timing()
+        resp.headers["Timing-Allow-Origin"] = "*"
+    if METRICS_ENABLED:
+        _record_request_metrics(resp)
+    _log_access(resp)
+    if g.get("otel_span") is not None:
+        g.otel_span.set_attribute("http.status_code", resp.status_code)
+        if resp.status_code >= 500:
+            from opentelemetry.trace import Status, StatusCode
+            g.otel_span.set_status(Status(StatusCode.ERROR))
+    return resp
+
+
+
+
+@app.teardown_request
+def _teardown(exc: Optional[BaseException]) -> None:
+    """
+    Ends the request span (if tracing) after the response, or an unhandled error, is final.
+    """
+    if _tracer is not None:
+        _end_request_span(exc)
+
+
+
+
+def _apply_http_caching(resp, encoding: Optional[str] = None):
+    """
+    Sets a strong ETag (the json_response() payload digest, which leaves out the request id,
+    or else a hash of the body, suffixed with the content encoding it will be sent with),
+    Last-Modified from the loader's data version, and Cache-Control; answers matching
+    conditional requests with 304.
+    """
+    if resp.status_code != 200 or not resp.is_json or resp.direct_passthrough:
+        return resp
+    etag = g.get("etag_digest") or hashlib.sha256(resp.get_data()).hexdigest()[:32]
+    resp.set_etag(f"{etag}-{encoding}" if encoding else etag)
+    if g.get("etag_digest"):
+        # data-backed responses only; read even with CACHE_ENABLED=0 (throttled, never raises)
+        _data_version()
+        if _data_version_state["loaded_at"] is not None:
+            resp.last_modified = _data_version_state["loaded_at"]
+    if HTTP_CACHE_CONTROL:
+        resp.headers["Cache-Control"] = HTTP_CACHE_CONTROL
+    return resp.make_conditional(request)
+
+
+
+
+# ------------------------------------------------------------------------------
+# Response compression
+# ------------------------------------------------------------------------------
+
+
+COMPRESSIBLE_MIMETYPES = frozenset({"application/json", "application/x-ndjson", "text/csv", "text/plain", "text/html"})
+
+_compression_lock = threading.Lock()
+_compression_stats: Dict[str, Dict[str, int]] = {}
+
+
+
+
+def _negotiate_encoding(resp) -> Optional[str]:
+    """
+    Picks br or gzip for a complete, compressible body of at least COMPRESS_MIN_BYTES,
+    following the client's Accept-Encoding preferences; None leaves the body as is.
+    """
+    if not COMPRESSION_ENABLED or resp.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return None
+    resp.vary.add("Accept-Encoding")
+    if (resp.status_code != 200 or resp.direct_passthrough or resp.is_streamed
+            or "Content-Encoding" in resp.headers):
+        return None
+    if (resp.calculate_content_length() or 0) < COMPRESS_MIN_BYTES:
+        return None
+    offered = ["br", "gzip"] if brotli is not None else ["gzip"]
+    return request.accept_encodings.best_match(offered)
+
+
+
+
+def _compress(resp, encoding: str) -> None:
+    """
+    Replaces the body with its encoded form and records the bytes saved.
+    """
+    raw = resp.get_data()
+    with _phase("compress"):
+        if encoding == "br":
+            body = brotli.compress(raw, quality=BROTLI_QUALITY)
+        else:
+            body = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+    resp.set_data(body)
+    resp.headers["Content-Encoding"] = encoding
+
+
+    with _compression_lock:
+        stats = _compression_stats.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+        stats["responses"] += 1
+        stats["bytes_in"] += len(raw)
+        stats["bytes_out"] += len(body)
+
+
+
+
+def compression_stats() -> Dict[str, Any]:
+    """
+    Per-encoding counters of compressed responses and the bytes they saved.
+    """
+    with _compression_lock:
+        per_encoding = {
+            enc: {**s, "bytes_saved": s["bytes_in"] - s["bytes_out"]} for enc, s in _compression_stats.items()
+        }
+    return {
+        "enabled": COMPRESSION_ENABLED,
+        "min_bytes": COMPRESS_MIN_BYTES,
+        "encodings": per_encoding,
+        "bytes_saved": sum(s["bytes_saved"] for s in per_encoding.values()),
+    }
+
+
+
+
+# ------------------------------------------------------------------------------
+# Sampling profiler (opt-in, per request)
+# ------------------------------------------------------------------------------
+# handle_resource and search_all are profiled for a PROFILE_SAMPLE_RATE fraction of
+# requests, or when an admin passes ?profile=1 with X-Admin-Token. A timer thread
+# samples the request thread's stack every PROFILE_INTERVAL_MS; the counts go to
+# PROFILE_DIR as collapsed stacks (flamegraph.pl, speedscope) or speedscope JSON.
+# Frame labels and both output formats match fbc-load-db/profiling.py, so API and
+# loader profiles open in the same tools; the Lambda image ships app.py alone, so
+# the code is mirrored rather than imported. Update both together.
+
+
+def _frame_name(code) -> str:
+    """
+    Frame label as in profiling.py, with the collapsed-stack separator replaced.
+    """
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(";", ",")
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack on a timer and counts identical (root-first) stacks.
+    """
+
+    def __init__(self, thread_id: int, interval_s: float) -> None:
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks: Dict[Tuple[str, ...], int] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="fbc-profiler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[str] = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                key = tuple(reversed(stack))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, name: str) -> str:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        if PROFILE_FORMAT == "speedscope":
+            frames: Dict[str, int] = {}
+            samples = [[frames.setdefault(f, len(frames)) for f in stack] for stack in self.stacks]
+            weights = [count * self.interval_s * 1e3 for count in self.stacks.values()]
+            path = os.path.join(PROFILE_DIR, f"{name}.speedscope.json")
+            body = json.dumps({
+                "$schema": "https://www.speedscope.app/file-format-schema.json",
+                "shared": {"frames": [{"name": f} for f in frames]},
+                "profiles": [{"type": "sampled", "name": name, "unit": "milliseconds", "startValue": 0,
+                              "endValue": sum(weights), "samples": samples, "weights": weights}],
+            })
+        else:
+            path = os.path.join(PROFILE_DIR, f"{name}.collapsed")
+            body = "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.items())
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body)
+        return path
+
+
+
+
+def _admin_token_ok() -> bool:
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN)
+
+
+
+
+def _profiled(fn: Callable) -> Callable:
+    """
+    Route decorator: samples the view when this request is selected for profiling.
+    Explicit admin profiles report the file name in an X-Profile response header.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        explicit = request.args.get("profile") == "1" and _admin_token_ok()
+        if not explicit and not _sampled(PROFILE_SAMPLE_RATE):
+            return fn(*args, **kwargs)
+        sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1e3).start()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            sampler.stop()
+            try:
+                path = sampler.write(f"{fn.__name__}-{_request_id()}")
+                logger.info("profile written: %s", path)
+                if explicit:
+                    g.profile_file = os.path.basename(path)
+            except OSError as e:
+                logger.warning("could not write profile: %s", e)
+    return wrapper
 
 
-    items = [_row_to_dict(r) for r in rows]
-    next_start = items[-1]["id"] if items else None
-    return items, next_start
 
 
+# ------------------------------------------------------------------------------
+# Routes
+# ------------------------------------------------------------------------------
 
 
-def _clamp_page_size(size: Optional[int]) -> int:
+@app.get("/health")
+def health():
     """
-    Clamps the page size to [1, MAX_PAGE_SIZE]. Raises ValueError on overflow.
+    Performs a lightweight health check and returns the result, including schema readiness.
     """
-    n = MAX_PAGE_SIZE if size is None else int(size)
-    if n < 1:
-        n = 1
-    if n > MAX_PAGE_SIZE:
-        raise ValueError(f"Requested size exceeds maximum ({MAX_PAGE_SIZE}).")
-    return n
-
-
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return jsonify({"ok": True, "schema": schema_catalog.status(), "request_id": _request_id()})
+    except Exception as e:
+        logger.exception("health check failed")
+        return json_error(500, "HealthCheckFailed", "Database connectivity check failed.", details={"reason": str(e)})
 
 
-def _order_numeric_first_sql() -> str:
-    """
-    ORDER BY clause that places numeric ids first (ascending as bigint), then lexicographic ids.
-    """
-    return """
-        ORDER BY
-            CASE WHEN id ~ '^[0-9]+$' THEN 0 ELSE 1 END,
-            (CASE WHEN id ~ '^[0-9]+$' THEN id::bigint END),
-            id
-    """
 
 
+# Query parameters that control paging/projection/format rather than filtering.
+RESERVED_ARGS = frozenset({"start", "size", "fields", "exclude", "ids", "format", "profile", "count"})
 
 
-def _apply_cursor(base_select: str, start: Optional[str], n: int) -> Tuple[str, Dict[str, Any]]:
+def _parse_filter_args() -> Tuple[Dict[str, Any], List[str]]:
     """
-    Builds cursored list query:
-      - No start: numeric-first from beginning
-      - Numeric start: numeric ids >= start plus any non-numeric ids after
-      - Non-numeric start: lexicographic WHERE id >= start
+    Splits the request's query string into filters and sort keys.
     """
-    params: Dict[str, Any] = {"n": n}
-
-
-    if start is None:
-        return base_select + _order_numeric_first_sql() + "\nLIMIT :n", params
+    filters: Dict[str, Any] = {}
+    sort: List[str] = []
+    for key, val in request.args.items():
+        if key in RESERVED_ARGS:
+            continue
+        elif key == "sort":
+            sort = [s.strip() for s in val.split(",") if s.strip()]
+        else:
+            filters[key] = val
+    return filters, sort
 
 
-    if str(start).isdigit():
-        params["start"] = start
-        return (
-            base_select
-            + """
-            WHERE
-                (id ~ '^[0-9]+$' AND CAST(id AS BIGINT) >= CAST(:start AS BIGINT))
-                OR (NOT id ~ '^[0-9]+$')
-            """
-            + _order_numeric_first_sql()
-            + "\nLIMIT :n",
-            params,
-        )
 
 
-    params["start"] = start
-    return (
-        base_select
-        + """
-        WHERE id >= :start
-        ORDER BY id
-        LIMIT :n
-        """,
-        params,
-    )
+def _error_response(e: Exception, table: str):
+    """
+    Maps an exception raised while serving a resource to a structured JSON error.
+    """
+    if isinstance(e, TableMissing):
+        return _service_not_ready(e.table)
+    if isinstance(e, ProgrammingError):
+        # Handles missing relations and syntax errors; returns descriptive output.
+        msg = str(e.__cause__ or e)
+        logger.exception("programming error")
+        schema_catalog.invalidate()
+        return json_error(500, "DatabaseProgrammingError", "Database query failed.", details={"reason": msg, "table": table})
+    if isinstance(e, OperationalError):
+        # Handles network, authentication, DNS, TLS errors.
+        msg = str(e.__cause__ or e)
+        logger.exception("operational error")
+        return json_error(503, "DatabaseUnavailable", "Database connection failed.", details={"reason": msg})
+    if isinstance(e, SQLAlchemyTimeout):
+        # Handles DB timeout while executing statements.
+        logger.exception("database timeout")
+        return json_error(504, "DatabaseTimeout", "Database operation timed out.")
+    if isinstance(e, IntegrityError):
+        # Not expected in read-only paths, but included for completeness.
+        msg = str(e.__cause__ or e)
+        logger.exception("integrity error")
+        return json_error(500, "DatabaseIntegrityError", "Database integrity error.", details={"reason": msg})
+    # Catch-all for unexpected errors; logs the stack trace and returns opaque details to clients.
+    logger.exception("unhandled error")
+    return json_error(500, "InternalServerError", "Unexpected error occurred.", details={"reason": str(e)})
 
 
-# ------------------------------------------------------------------------------
-# Filtering and sorting helper
-# ------------------------------------------------------------------------------
 
 
-def _apply_filters_and_sort(resource: str, filters: Dict[str, Any], sort: List[str]) -> Tuple[str, Dict[str, Any]]:
+@app.get("/v1/<resource>")
+@app.get("/v1/<resource>/<item_id>")
+@_profiled
+def handle_resource(resource: str, item_id: Optional[str] = None):
     """
-    Builds dynamic SQL WHERE and ORDER BY clauses for filtering, sorting, and searching.
-    Supports:
-      - Exact match filters: city, eligibility, urgency
-      - ZIP prefix match: zipcode
-      - JSON containment: languages
-      - Text search via `search` key
-      - Sorting via frontend-friendly values or raw column names
+    Serves a collection or a single item for the specified resource.
     """
-    where_clauses = []
-    order_clauses = []
-    params: Dict[str, Any] = {}
+    if resource not in ALLOWED_TYPES:
+        return json_error(404, "NotFound", "Unknown resource.", details={"resource": resource})
 
 
-    # --- Model-specific searchable columns for full-text search ---
-    searchable_columns_by_model = {
-        "foodbanks": ["name", "about", "city", "address", "eligibility", "urgency"],
-        "programs": ["name", "description", "eligibility", "category", "location"],
-        "sponsors": ["name", "description", "website", "city", "contact"],
-    }
-    searchable_columns = searchable_columns_by_model.get(resource, ["name"])
+    table = _table_qualified(resource)
+    try:
+        fields = _resolve_fields(resource, request.args.get("fields"), request.args.get("exclude"))
+    except ValueError as ve:
+        return json_error(400, "BadRequest", str(ve), details={"fields": list(RESOURCE_COLUMNS[resource])})
 
 
-    # --- Full-text search ---
-    search_term = filters.pop("search", None)
-    if search_term:
-        search_term = search_term.strip()
-        if search_term:
-            search_clauses = [f"{col} ILIKE :search" for col in searchable_columns]
-            where_clauses.append("(" + " OR ".join(search_clauses) + ")")
-            params["search"] = f"%{search_term}%"
+    try:
+        if item_id:
+            def load_item():
+                if not _table_exists(table):
+                    raise TableMissing(table)
+                return fetch_one(resource, item_id, fields)  # None is cached negatively
+
+            obj = _cached(_cache_key("item", resource, id=item_id, fields=fields), load_item)
+            if not obj:
+                singular = {"foodbanks": "Foodbank", "programs": "Program", "sponsors": "Sponsor"}.get(resource, "Item")
+                return json_error(404, "NotFound", f"{singular} not found.", details={"id": item_id})
+            if isinstance(obj, RawJSON):
+                return json_response(_merge_raw_object(obj, {"type": ALLOWED_TYPES[resource]}))
+            return json_response({"type": ALLOWED_TYPES[resource], **obj})
 
 
-    for i, (col, val) in enumerate(filters.items()):
-        if not val or str(val).strip().lower() in ["all", "any"]:
-            continue  # skip empty or "All" filters
+        if request.args.get("ids") is not None:
+            return _batch_response(resource, request.args.get("ids"), fields)
 
 
-        val = str(val).strip()
-        param = f"f{i}"
+        # -----------------------------
+        # Filtering and sorting support
+        # -----------------------------
+        filters, sort = _parse_filter_args()
+        try:
+            _validate_filters_and_sort(resource, filters, sort)
+        except ValueError as ve:
+            return json_error(400, "BadRequest", str(ve))
 
 
-        if col == "languages":
-            where_clauses.append(f"{col} @> :{param}")
-            params[param] = f'["{val}"]'
+        try:
+            size_str = request.args.get("size")
+            size = int(size_str) if size_str else 25
+        except ValueError:
+            return json_error(400, "BadRequest", "Query parameter 'size' must be an integer.")
 
 
-        elif col == "zipcode":
-            # Normalize and perform prefix match (ignore dashes)
-            val = val.replace("-", "").strip()
-            where_clauses.append(f"REPLACE({col}, '-', '') LIKE :{param}")
-            params[param] = f"{val}%"
+        start = request.args.get("start")
+        count_mode = (request.args.get("count") or "none").lower()
+        if count_mode not in COUNT_MODES:
+            return json_error(400, "BadRequest", f"Query parameter 'count' must be one of: {', '.join(COUNT_MODES)}.",
+                              details={"count": count_mode})
+
+        def load_page():
+            if not _table_exists(table):
+                raise TableMissing(table)
+            items, next_start, has_more = fetch_list(resource, start, size, filters, sort, fields)
+            page = {"items": items, "has_more": has_more}
+            if next_start:
+                page["next_start"] = next_start
+            if count_mode != "none":
+                page["total"] = count_rows(resource, filters, count_mode)
+            return page
+
+        key = _cache_key("list", resource, filters=filters, sort=sort, size=size, start=start, fields=fields,
+                         count=count_mode)
+        try:
+            page = _cached(key, load_page)
+        except ValueError as ve:
+            return json_error(400, "BadRequest", str(ve), details={"max_size": MAX_PAGE_SIZE})
 
 
-        elif col in ["city", "eligibility", "urgency"]:
-            where_clauses.append(f"{col} = :{param}")
-            params[param] = val
+        resp = json_response(page)
+        if "total" in page:
+            resp.headers["X-Total-Count"] = str(page["total"]["count"])
+            resp.headers["X-Total-Count-Accuracy"] = page["total"]["accuracy"]
+        return resp
 
 
-        else:
-            where_clauses.append(f"{col} ILIKE :{param}")
-            params[param] = f"%{val}%"
+    except Exception as e:
+        return _error_response(e, table)
 
 
+def _batch_response(resource: str, raw_ids: Any, fields: Optional[List[str]]):
+    """
+    Serves a multi-get: found items in request order plus the ids that were not found.
+    """
+    try:
+        ids = _parse_ids(raw_ids)
+    except ValueError as ve:
+        return json_error(400, "BadRequest", str(ve), details={"max_ids": MAX_BATCH_SIZE})
 
+    table = _table_qualified(resource)
 
-    # --- Compose WHERE clause ---
-    where_sql = ""
-    if where_clauses:
-        where_sql = " WHERE " + " AND ".join(where_clauses)
+    def load_batch():
+        if not _table_exists(table):
+            raise TableMissing(table)
+        items, missing = fetch_many(resource, ids, fields)
+        return {"items": items, "missing": missing}
 
+    batch = _cached(_cache_key("batch", resource, ids=ids, fields=fields), load_batch)
+    return json_response(batch)
 
-    # --- Sorting ---
-    SORT_MAPPING = {
-        "name_asc": ("name", "ASC"),
-        "name_desc": ("name", "DESC"),
-        "urgency_high": ("urgency", "DESC"),
-        "urgency_low": ("urgency", "ASC"),
-    }
 
 
-    for s in sort:
-        if s in SORT_MAPPING:
-            col_name, direction = SORT_MAPPING[s]
-            order_clauses.append(f"{col_name} {direction}")
-        else:
-            # Handle raw sort values from frontend: sort=name / sort=-name
-            direction = "DESC" if s.startswith("-") else "ASC"
-            col_name = s.lstrip("-")
-            order_clauses.append(f"{col_name} {direction}")
 
+@app.post("/v1/<resource>/batch")
+def batch_resource(resource: str):
+    """
+    Multi-get by POST body: {"ids": [...], "fields": "..."}; same response as ?ids=.
+    """
+    if resource not in ALLOWED_TYPES:
+        return json_error(404, "NotFound", "Unknown resource.", details={"resource": resource})
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict) or "ids" not in body:
+        return json_error(400, "BadRequest", 'Request body must be a JSON object with an "ids" array.')
+    raw_fields = body.get("fields") or request.args.get("fields")
+    raw_exclude = body.get("exclude") or request.args.get("exclude")
+    for name, raw in (("fields", raw_fields), ("exclude", raw_exclude)):
+        if raw is not None and not isinstance(raw, str):
+            return json_error(400, "BadRequest", f'"{name}" must be a comma-separated string.',
+                              details={"fields": list(RESOURCE_COLUMNS[resource])})
+    try:
+        fields = _resolve_fields(resource, raw_fields, raw_exclude)
+    except ValueError as ve:
+        return json_error(400, "BadRequest", str(ve), details={"fields": list(RESOURCE_COLUMNS[resource])})
+    try:
+        return _batch_response(resource, body["ids"], fields)
+    except Exception as e:
+        return _error_response(e, _table_qualified(resource))
 
-    order_sql = ""
-    if order_clauses:
-        order_sql = " ORDER BY " + ", ".join(order_clauses)
 
+@app.get("/v1/<resource>/facets")
+def facets_resource(resource: str):
+    """
+    Value -> count maps for the fields= facets (default: all), honouring the other active
+    filters. Accepts the same filter parameters as the list endpoint.
+    """
+    if resource not in ALLOWED_TYPES:
+        return json_error(404, "NotFound", "Unknown resource.", details={"resource": resource})
+    try:
+        fields = _resolve_facet_fields(resource, request.args.get("fields"))
+    except ValueError as ve:
+        return json_error(400, "BadRequest", str(ve), details={"fields": list(FACET_COLUMNS[resource])})
 
-    # --- Debug logging ---
-    logger.debug(f"Filters applied: {filters}")
-    logger.debug(f"WHERE clause: {where_sql}")
-    logger.debug(f"ORDER clause: {order_sql}")
-    logger.debug(f"Params: {params}")
+    table = _table_qualified(resource)
+    filters, _ = _parse_filter_args()
+    try:
+        _validate_filters_and_sort(resource, filters, [])
+    except ValueError as ve:
+        return json_error(400, "BadRequest", str(ve))
 
+    def load_facets():
+        if not _table_exists(table):
+            raise TableMissing(table)
+        return {"facets": fetch_facets(resource, fields, filters)}
 
-    return where_sql + order_sql, params
+    try:
+        page = _cached(_cache_key("facets", resource, fields=fields, filters=filters), load_facets)
+    except ValueError as ve:
+        return json_error(400, "BadRequest", str(ve))
+    except Exception as e:
+        return _error_response(e, table)
+    return json_response(page)
 
 
 
 
 # ------------------------------------------------------------------------------
-# Request logging
+# Bulk export (streamed NDJSON / CSV)
 # ------------------------------------------------------------------------------
 
 
-@app.before_request
-def _assign_request_id_and_log():
+def _export_default(value: Any) -> Any:
     """
-    Assigns a per-request id and records a concise access log line.
+    JSON fallback for export rows: ISO-8601 timestamps, everything else as str.
     """
-    _request_id()
-    logger.info(
-        "REQ %s %s %s %s",
-        request.method,
-        request.path,
-        request.remote_addr,
-        dict(request.args),
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode_ndjson(rows: List[Row], columns: List[str]) -> str:
+    """
+    Encodes a batch of rows as newline-delimited JSON objects.
+    """
+    return "".join(
+        json.dumps(_row_to_dict(r, columns), default=_export_default, ensure_ascii=False) + "\n"
+        for r in rows
     )
 
 
+def _csv_cell(value: Any) -> Any:
+    """
+    Flattens one value for CSV: JSON columns become compact JSON text, timestamps ISO-8601.
+    """
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return value
 
 
-@app.after_request
-def _after(resp):
+def _encode_csv(rows: List[Row], columns: List[str]) -> str:
     """
-    Adds request id header to all responses.
+    Encodes a batch of rows as CSV lines in column order.
     """
-    resp.headers["X-Request-Id"] = _request_id()
-    return resp
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for r in rows:
+        mapping = r._mapping
+        writer.writerow([_csv_cell(mapping[c]) for c in columns])
+    return buf.getvalue()
 
 
+def _encode_csv_header(columns: List[str]) -> str:
+    """
+    Encodes the CSV header row.
+    """
+    buf = io.StringIO()
+    csv.writer(buf).writerow(columns)
+    return buf.getvalue()
 
 
-# ------------------------------------------------------------------------------
-# Routes
-# ------------------------------------------------------------------------------
+EXPORT_FORMATS: Dict[str, Tuple[str, Callable[[List[Row], List[str]], str]]] = {
+    "ndjson": ("application/x-ndjson", _encode_ndjson),
+    "csv": ("text/csv", _encode_csv),
+}
 
 
-@app.get("/health")
-def health():
+def open_export(resource: str, filters: Dict[str, Any], sort: List[str],
+                fields: Optional[List[str]]) -> Tuple[List[str], Any, Any]:
     """
-    Performs a lightweight health check and returns the result.
+    Runs the filtered/sorted query for a whole resource on a server-side (named) cursor.
+    Returns (columns, connection, result); the caller iterates result.partitions() and closes both.
+    columns are exactly the selected columns, so encoders never meet a missing key mid-stream.
+    Raises ValueError on fields the resource does not have, before any I/O.
     """
+    unknown = [c for c in fields or () if c not in RESOURCE_COLUMNS[resource]]
+    if unknown:
+        raise ValueError(f"Unknown field(s) for {resource}: {', '.join(unknown)}.")
+    t = _table(resource)
+    # Requested fields the live table lacks are dropped here, as in list responses
+    columns = _projection(resource, fields)
+    stmt, params = _apply_filters_and_sort(resource, select(*[t.c[c] for c in columns]),
+                                           filters, _order_keys(resource, sort))
+
+    conn = get_engine().connect()
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
-        return jsonify({"ok": True, "request_id": _request_id()})
-    except Exception as e:
-        logger.exception("health check failed")
-        return json_error(500, "HealthCheckFailed", "Database connectivity check failed.", details={"reason": str(e)})
+        result = conn.execution_options(stream_results=True, yield_per=EXPORT_BATCH_SIZE).execute(stmt, params)
+    except Exception:
+        conn.close()
+        raise
+    return columns, conn, result
 
 
 
 
-@app.get("/v1/<resource>")
-@app.get("/v1/<resource>/<item_id>")
-def handle_resource(resource: str, item_id: Optional[str] = None):
+@app.get("/v1/<resource>/export")
+def export_resource(resource: str):
     """
-    Serves a collection or a single item for the specified resource.
+    Streams every matching row as NDJSON (default) or CSV, one encoded batch at a time,
+    so memory stays flat regardless of table size. Accepts the same filters, sort and
+    fields= / exclude= parameters as the list endpoint.
     """
     if resource not in ALLOWED_TYPES:
         return json_error(404, "NotFound", "Unknown resource.", details={"resource": resource})
-
+    fmt = (request.args.get("format") or "ndjson").lower()
+    if fmt not in EXPORT_FORMATS:
+        return json_error(400, "BadRequest", "Query parameter 'format' must be one of: ndjson, csv.",
+                          details={"format": fmt})
 
     table = _table_qualified(resource)
     try:
+        fields = _resolve_fields(resource, request.args.get("fields"), request.args.get("exclude"))
+        filters, sort = _parse_filter_args()
+        _validate_filters_and_sort(resource, filters, sort)
         if not _table_exists(table):
-            return json_error(
-                503,
-                "ServiceNotReady",
-                "Required database table is missing.",
-                details={"schema": SCHEMA, "missing": [table]},
-            )
+            raise TableMissing(table)
+        columns, conn, result = open_export(resource, filters, sort, fields)
+    except ValueError as ve:
+        return json_error(400, "BadRequest", str(ve))
+    except Exception as e:
+        return _error_response(e, table)
 
+    mimetype, encode = EXPORT_FORMATS[fmt]
 
-        if item_id:
-            obj = fetch_one(resource, item_id)
-            if not obj:
-                singular = {"foodbanks": "Foodbank", "programs": "Program", "sponsors": "Sponsor"}.get(resource, "Item")
-                return json_error(404, "NotFound", f"{singular} not found.", details={"id": item_id})
-            return jsonify({"type": ALLOWED_TYPES[resource], **obj, "request_id": _request_id()})
+    def generate():
+        try:
+            if fmt == "csv":
+                yield _encode_csv_header(columns)
+            for batch in result.partitions():
+                yield encode(batch, columns)
+        except Exception:
+            # Headers are already sent; a truncated body is the only signal left.
+            logger.exception("export of %s aborted", resource)
+        finally:
+            result.close()
+            conn.close()
+
+    resp = Response(generate(), mimetype=mimetype)
+    resp.headers["Content-Disposition"] = f'attachment; filename="{resource}.{fmt}"'
+    return resp
 
 
-        # -----------------------------
-        # Filtering and sorting support
-        # -----------------------------
-        filters = {}
-        sort = []
+# ------------------------------------------------------------------------------
+# Admin routes
+# ------------------------------------------------------------------------------
 
 
-        for key, val in request.args.items():
-            if key in ("start", "size"):
-                continue
-            elif key == "sort":
-                sort = [s.strip() for s in val.split(",") if s.strip()]
-            else:
-                filters[key] = val
+def _require_admin():
+    """
+    Returns an error response unless the request carries the configured ADMIN_TOKEN.
+    Admin routes are hidden (404) when no token is configured.
+    """
+    if not ADMIN_TOKEN:
+        return json_error(404, "NotFound", "Unknown route.")
+    if not _admin_token_ok():
+        return json_error(403, "Forbidden", "Admin token missing or invalid.")
+    return None
 
 
-        try:
-            size_str = request.args.get("size")
-            size = int(size_str) if size_str else 25
-        except ValueError:
-            return json_error(400, "BadRequest", "Query parameter 'size' must be an integer.")
 
 
-        try:
-            items, next_start = fetch_list(resource, request.args.get("start"), size, filters, sort)
-        except ValueError as ve:
-            return json_error(400, "BadRequest", str(ve), details={"max_size": MAX_PAGE_SIZE})
+@app.get("/admin/stats")
+def admin_stats():
+    """
+    Reports response-cache counters, the data version they are keyed on, compression savings,
+    connection-pool telemetry and prepared statements.
+    """
+    denied = _require_admin()
+    if denied:
+        return denied
+    return jsonify({
+        "cache": {
+            "enabled": CACHE_ENABLED,
+            "data_version": _data_version_state["version"],
+            **response_cache.stats(),
+        },
+        "shared_cache": shared_cache.stats() if shared_cache else None,
+        "compression": compression_stats(),
+        "pool": pool_telemetry.stats(_engine.pool if _engine is not None else None),
+        "prepared": prepared_stats(),
+        "request_id": _request_id(),
+    })
 
 
-        payload: Dict[str, Any] = {"items": items, "request_id": _request_id()}
-        if next_start:
-            payload["next_start"] = next_start
-        return jsonify(payload)
+@app.get("/admin/slow-queries")
+def admin_slow_queries():
+    """
+    Lists the worst query fingerprints (?order=total_ms|max_ms|mean_ms, ?limit=N) with
+    their sampled EXPLAIN (ANALYZE, BUFFERS) plans.
+    """
+    denied = _require_admin()
+    if denied:
+        return denied
+    order = request.args.get("order", "total_ms")
+    if order not in ("total_ms", "max_ms", "mean_ms"):
+        return json_error(400, "BadRequest", "order must be total_ms, max_ms or mean_ms.")
+    try:
+        limit = max(1, min(int(request.args.get("limit", "20")), QUERY_LOG_MAX_FINGERPRINTS))
+    except ValueError:
+        return json_error(400, "BadRequest", "limit must be an integer.")
+    return jsonify({
+        "threshold_ms": SLOW_QUERY_MS,
+        "explain_sample_rate": EXPLAIN_SAMPLE_RATE,
+        "items": query_log.worst(limit, order),
+        "request_id": _request_id(),
+    })
 
 
-    except ProgrammingError as e:
-        # Handles missing relations and syntax errors; returns descriptive output.
-        msg = str(e.__cause__ or e)
-        logger.exception("programming error")
-        return json_error(500, "DatabaseProgrammingError", "Database query failed.", details={"reason": msg, "table": table})
-    except OperationalError as e:
-        # Handles network, authentication, DNS, TLS errors.
-        msg = str(e.__cause__ or e)
-        logger.exception("operational error")
-        return json_error(503, "DatabaseUnavailable", "Database connection failed.", details={"reason": msg})
-    except SQLAlchemyTimeout as e:
-        # Handles DB timeout while executing statements.
-        logger.exception("database timeout")
-        return json_error(504, "DatabaseTimeout", "Database operation timed out.")
-    except IntegrityError as e:
-        # Not expected in read-only paths, but included for completeness.
-        msg = str(e.__cause__ or e)
-        logger.exception("integrity error")
-        return json_error(500, "DatabaseIntegrityError", "Database integrity error.", details={"reason": msg})
-    except Exception as e:
-        # Catch-all for unexpected errors; logs the stack trace and returns opaque details to clients.
-        logger.exception("unhandled error")
-        return json_error(500, "InternalServerError", "Unexpected error occurred.", details={"reason": str(e)})
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    """
+    Prometheus scrape target. When ADMIN_TOKEN is set it must be sent as
+    X-Admin-Token or as an Authorization bearer token.
+    """
+    if not METRICS_ENABLED:
+        return json_error(404, "NotFound", "Unknown route.")
+    if ADMIN_TOKEN:
+        supplied = request.headers.get("X-Admin-Token") or request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not hmac.compare_digest(supplied, ADMIN_TOKEN):
+            return json_error(403, "Forbidden", "Admin token missing or invalid.")
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # ------------------------------------------------------------------------------
@@ -573,102 +3260,96 @@ def handle_resource(resource: str, item_id: Optional[str] = None):
 # ------------------------------------------------------------------------------
 
 
-@app.get("/v1/search")
-def search_all():
+def _search_sql(resource: str) -> str:
     """
-    Performs a full-site text search across foodbanks, programs, and sponsors.
-    Returns ranked results with snippets highlighting matches.
+    Builds the ranked full-text query for one resource. Ranking and the LIMIT run over the
+    GIN-matched rows only; ts_headline is evaluated just for the rows that survive the cap.
+    """
+    document = ", ".join(f"t.{col}" for col in SNIPPET_COLUMNS[resource])
+    return f"""
+        WITH q AS (SELECT websearch_to_tsquery('{SEARCH_CONFIG}', :q) AS query),
+        hits AS (
+            SELECT t.id, t.id_num, t.name, concat_ws(' ', {document}) AS document,
+                   ts_rank_cd(t.search_doc, q.query, 32) AS score
+            FROM {_table_qualified(resource)} AS t, q
+            WHERE t.search_doc @@ q.query
+            ORDER BY score DESC, t.id_num, t.id
+            LIMIT :limit
+        )
+        SELECT hits.id, hits.name, hits.score,
+               ts_headline('{SEARCH_CONFIG}', hits.document, q.query,
+                           'MaxFragments=1, MaxWords=30, MinWords=12, StartSel="", StopSel=""') AS snippet
+        FROM hits, q
+        ORDER BY hits.score DESC, hits.id_num, hits.id
     """
-    query = (request.args.get("q") or "").strip()
-    if not query:
-        return jsonify({"items": [], "request_id": _request_id()})
 
 
-    q_lower = query.lower()
-    query_terms = re.findall(r"\b\w+\b", q_lower)
+
+
+def _run_search(query: str) -> List[Dict[str, Any]]:
+    """
+    Runs the ranked search against every resource and merges the per-model rankings.
+    Raises UncacheableResult with the partial list if any resource query failed.
+    """
     results: List[Dict[str, Any]] = []
+    params = {"q": query, "limit": SEARCH_RESULT_LIMIT}
+    failed = False
 
 
-    def relevance_score(text: str) -> int:
-        """Compute a simple relevance score based on phrase and word frequency."""
-        text_lower = text.lower()
-        phrase_score = text_lower.count(q_lower) * 3
-        word_score = sum(text_lower.count(term) for term in query_terms)
-        return phrase_score + word_score
-
-
-    def get_snippet(text: str) -> str:
-        """Return ~150 chars of surrounding text around the first match."""
-        text_lower = text.lower()
-        # Try to find the query phrase first, then individual terms
-        idx = text_lower.find(q_lower)
-        if idx != -1:
-            start = max(0, idx - 60)
-            end = min(len(text), idx + len(q_lower) + 60)
-            return text[start:end]
-        # Fall back to first matching term
-        for term in query_terms:
-            if len(term) > 2:  # Skip very short terms
-                idx = text_lower.find(term)
-                if idx != -1:
-                    start = max(0, idx - 60)
-                    end = min(len(text), idx + len(term) + 60)
-                    return text[start:end]
-        # If no match found, return beginning of text
-        return text[:150] if len(text) > 150 else text
-
-
-    with engine.connect() as conn:
+    with get_engine().connect() as conn:
         for model in ALLOWED_TYPES.keys():
-            table = _table_qualified(model)
             try:
-                # Get all rows and convert to searchable text
-                sql = text(f"SELECT * FROM {table}")
-                rows = conn.execute(sql).fetchall()
-
-
-                for row in rows:
-                    # Convert row to dict and create searchable text from all string fields
-                    row_dict = _row_to_dict(row)
-                    # Concatenate all text fields for searching
-                    text_parts = []
-                    for key, value in row_dict.items():
-                        if value is not None:
-                            if isinstance(value, (list, dict)):
-                                text_parts.append(str(value))
-                            else:
-                                text_parts.append(str(value))
-                    text_blob = " ".join(text_parts)
-                   
-                    score = relevance_score(text_blob)
-                    if score > 0:
-                        # Use the original model name (lowercase) to match route paths
-                        model_name = model  # e.g., "foodbanks", "programs", "sponsors"
-                        snippet = get_snippet(text_blob)
-                        # Clean up snippet - remove extra whitespace and newlines
-                        snippet = " ".join(snippet.split())[:150]
-                       
-                        results.append({
-                            "model": model_name,  # lowercase to match routes
-                            "id": row_dict.get("id", ""),
-                            "name": row_dict.get("name") or "(Unnamed)",
-                            "snippet": snippet,
-                            "score": score,
-                        })
+                rows = conn.execute(text(_search_sql(model)), params).fetchall()
             except Exception as e:
                 logger.warning("Search failed for %s: %s", model, e)
                 logger.exception("Full error details")
+                conn.rollback()
+                failed = True
                 continue
 
 
-    # Sort by relevance (highest first)
-    results.sort(key=lambda r: r["score"], reverse=True)
+            with _phase("map"):
+                for row in rows:
+                    # Clean up snippet - remove extra whitespace and newlines
+                    snippet = " ".join((row.snippet or "").split())[:150]
+                    results.append({
+                        "model": model,  # lowercase to match routes
+                        "id": row.id,
+                        "name": row.name or "(Unnamed)",
+                        "snippet": snippet,
+                        "score": float(row.score),
+                    })
+
 
+    # Merge per-model rankings (highest first) and keep the overall cap
+    with _phase("score"):
+        results.sort(key=lambda r: r["score"], reverse=True)
+        del results[SEARCH_RESULT_LIMIT:]
+    if failed:
+        raise UncacheableResult(results)
+    return results
 
-    return jsonify({
+
+
+
+@app.get("/v1/search")
+@_profiled
+def search_all():
+    """
+    Performs a full-site text search across foodbanks, programs, and sponsors.
+    Returns ranked results with snippets highlighting matches.
+    """
+    query = (request.args.get("q") or "").strip()
+    if not query:
+        return json_response({"items": []})
+
+
+    results = _cached(_cache_key("search", "*", q=query), lambda: _run_search(query))
+
+
+    return json_response({
         "items": results,
         "query": query,
-        "request_id": _request_id(),
     })
 
 
@@ -698,10 +3379,29 @@ def _normalize_http_event(e: dict) -> dict:
     return e  # already v1 or non-HTTP
 
 
+def _binary_safe_response(result: dict) -> dict:
+    """
+    Ensures an encoded (gzip/br) body reaches API Gateway as base64 with isBase64Encoded set.
+    Mangum only base64s bodies that fail to decode as UTF-8, which compressed bytes may not.
+    """
+    if not isinstance(result, dict) or result.get("isBase64Encoded") or not result.get("body"):
+        return result
+    headers = {**(result.get("multiValueHeaders") or {}), **(result.get("headers") or {})}
+    if any(k.lower() == "content-encoding" for k in headers):
+        # the adapter produced the body by decoding the bytes as UTF-8, so this round-trips
+        result["body"] = base64.b64encode(result["body"].encode("utf-8")).decode("ascii")
+        result["isBase64Encoded"] = True
+    return result
+
+
 def lambda_handler(event, context):
     import awsgi  # this is the module provided by aws-wsgi
     print("event version:", event.get("version"))
-    return awsgi.response(app, _normalize_http_event(event), context)
+    # aws-wsgi decodes every body as UTF-8 unless its content type is listed as base64, so list
+    # every type _compress may encode; API Gateway decodes the base64 before the client sees it
+    result = awsgi.response(app, _normalize_http_event(event), context, base64_content_types=COMPRESSIBLE_MIMETYPES)
+    _maybe_push_metrics()
+    return result
 
 
 
@@ -716,33 +3416,52 @@ def docs():
             "/v1/foodbanks": {
                 "description": "List or filter foodbanks",
                 "query_parameters": {
-                    "search": "Full-text search on name, about, city, address, eligibility, urgency",
+                    "search": "Full-text search (web-search syntax) on name, city, urgency, eligibility, services, about, address, zipcode, languages",
                     "city": "Filter by city name",
                     "urgency": "Filter by urgency level",
                     "eligibility": "Filter by eligibility type",
                     "sort": "Sort results (e.g., sort=name,-urgency)",
-                    "start": "Pagination start id",
-                    "size": f"Page size (1-{MAX_PAGE_SIZE})"
+                    "start": "Pagination cursor (the next_start value of the previous page)",
+                    "size": f"Page size (1-{MAX_PAGE_SIZE})",
+                    "count": (f"Total matches: none (default), estimate (planner statistics) or exact "
+                              f"(at most {COUNT_EXACT_CAP}); returned as total and in X-Total-Count"),
+                    "fields": "Comma-separated columns or presets to return (e.g., fields=card or fields=id,name,city)",
+                    "exclude": "Comma-separated columns or presets to omit (e.g., exclude=about,open_hours)",
+                    "ids": f"Multi-get: comma-separated ids (at most {MAX_BATCH_SIZE}); also POST /v1/<resource>/batch"
                 }
             },
             "/v1/programs": {
                 "description": "List or filter programs",
                 "query_parameters": {
-                    "search": "Full-text search on name, description, category, eligibility, location",
-                    "category": "Filter by program category",
-                    "sort": "Sort results (e.g., sort=-name,location)"
+                    "search": "Full-text search (web-search syntax) on name, program_type, host, eligibility, about, frequency, cost",
+                    "program_type": "Filter by program type",
+                    "sort": "Sort results (e.g., sort=-name,program_type)"
                 }
             },
             "/v1/sponsors": {
                 "description": "List or filter sponsors",
                 "query_parameters": {
-                    "search": "Full-text search on name, description, website, city, contact",
+                    "search": "Full-text search (web-search syntax) on name, affiliation, contribution, city, about, past_involvement, contact",
                     "city": "Filter by city",
                     "sort": "Sort results (e.g., sort=name)"
                 }
             },
+            "/v1/<resource>/export": {
+                "description": "Stream every matching row as NDJSON or CSV",
+                "query_parameters": {
+                    "format": "ndjson (default) or csv",
+                    "fields": "Columns or presets to include; list filters and sort also apply"
+                }
+            },
+            "/v1/<resource>/facets": {
+                "description": "Value -> count maps for filter dropdowns, honouring the other active filters",
+                "query_parameters": {
+                    "fields": "Comma-separated facets (default: all), e.g. fields=city,urgency,languages,zipcode",
+                    "<filter>": "Any list filter; a facet ignores its own filter"
+                }
+            },
             "/v1/search": {
-                "description": "Global search across all models using ?q=<term>"
+                "description": f"Global ranked search across all models using ?q=<term> (at most {SEARCH_RESULT_LIMIT} results)"
             }
         }
     }
@@ -752,8 +3471,37 @@ def docs():
 # ------------------------------------------------------------------------------
 # Local development entrypoint
 # ------------------------------------------------------------------------------
-from mangum import Mangum
-handler = Mangum(app)
+_mangum = None
+
+
+def handler(event, context):
+    """
+    Mangum entrypoint; the adapter is imported on the first invocation only.
+    """
+    global _mangum
+    if _mangum is None:
+        from mangum import Mangum
+        _mangum = Mangum(app)
+    result = _binary_safe_response(_mangum(event, context))
+    _maybe_push_metrics()
+    return result
+
+
+def _prewarm() -> None:
+    """
+    Opens the first pooled connection and loads the schema catalog during init,
+    so the first request does not pay for them. Enabled with PREWARM_DB=1.
+    """
+    try:
+        with get_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+        schema_catalog.status()
+    except Exception:
+        logger.warning("prewarm failed; continuing without a warm connection", exc_info=True)
+
+
+if PREWARM_DB:
+    _prewarm()
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", "8000")), debug=False)
\ No newline at end of file
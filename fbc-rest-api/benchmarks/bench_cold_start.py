@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# ============================================================================
+#  © 2025 Francisco Vivas Puerto (aka “DaFrancc”)
+#  All rights reserved. This file is part of the FoodBankConnect API.
+#  Use and distribution permitted with attribution to the author.
+# ============================================================================
+"""
+Cold-start benchmark
+--------------------
+Starts a fresh interpreter per run (as a new Lambda execution environment would) and measures:
+
+- import time of app.py
+- time to first response for /v1/docs (no database needed), via the WSGI test
+  client or, with --adapter awsgi, through lambda_handler with an HTTP API v2 event
+
+It also checks that the DB driver, CORS and the Lambda adapters are still deferred
+after import. The script exits non-zero when either median regresses by more than
+--max-regression against a saved --baseline (recorded on the same machine with
+--save-baseline), so it can gate CI. Absolute timings depend on the machine, so the
+import-time budget is opt-in (--import-budget-ms).
+
+Usage: python benchmarks/bench_cold_start.py [--runs N] [--baseline FILE] [--save-baseline FILE]
+                                             [--import-budget-ms MS]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules app.py must not import until they are needed
+DEFERRED_MODULES = ("psycopg", "flask_cors", "mangum", "awsgi")
+
+_PROBE = r"""
+import json, sys, time
+sys.path.insert(0, {app_dir!r})
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+loaded = [m for m in {deferred!r} if m in sys.modules]
+if {adapter!r} == "awsgi":
+    event = {{
+        "version": "2.0", "rawPath": "/v1/docs", "headers": {{}},
+        "requestContext": {{"http": {{"method": "GET", "sourceIp": "127.0.0.1"}}}},
+    }}
+    status = app.lambda_handler(event, None)["statusCode"]
+else:
+    status = app.app.test_client().get("/v1/docs").status_code
+t2 = time.perf_counter()
+print(json.dumps({{"import_ms": (t1 - t0) * 1e3, "first_response_ms": (t2 - t1) * 1e3,
+                  "status": status, "loaded_at_import": loaded}}))
+"""
+
+
+def _probe(adapter: str) -> dict:
+    """
+    Runs one cold start in a new interpreter and returns its timings.
+    """
+    env = {**os.environ, "PREWARM_DB": "0", "REDIS_URL": ""}
+    code = _PROBE.format(app_dir=APP_DIR, deferred=DEFERRED_MODULES, adapter=adapter)
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    # app logs share stdout, so pick the probe's own line
+    return json.loads(next(line for line in out.stdout.splitlines() if line.startswith('{"import_ms"')))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--adapter", choices=("wsgi", "awsgi"), default="wsgi")
+    parser.add_argument("--import-budget-ms", type=float, help="fail when the median import time exceeds MS")
+    parser.add_argument("--baseline", help="JSON file written by --save-baseline to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed fractional slowdown vs baseline")
+    parser.add_argument("--save-baseline", help="write the medians of this run to FILE")
+    args = parser.parse_args()
+
+    runs = [_probe(args.adapter) for _ in range(args.runs)]
+    result = {
+        "import_ms": statistics.median(r["import_ms"] for r in runs),
+        "first_response_ms": statistics.median(r["first_response_ms"] for r in runs),
+    }
+    print(f"{args.runs} cold starts ({args.adapter})")
+    print(f"  import            median {result['import_ms']:8.1f} ms   max {max(r['import_ms'] for r in runs):8.1f} ms")
+    print(f"  first response    median {result['first_response_ms']:8.1f} ms"
+          f"   max {max(r['first_response_ms'] for r in runs):8.1f} ms")
+
+    failures = []
+    if any(r["status"] != 200 for r in runs):
+        failures.append(f"first response status {sorted({r['status'] for r in runs})}")
+    eager = sorted({m for r in runs for m in r["loaded_at_import"]})
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if args.import_budget_ms is not None and result["import_ms"] > args.import_budget_ms:
+        failures.append(f"import {result['import_ms']:.1f} ms exceeds budget {args.import_budget_ms:.1f} ms")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        for key, value in result.items():
+            limit = baseline[key] * (1 + args.max_regression)
+            if value > limit:
+                failures.append(f"{key} {value:.1f} ms regressed past {limit:.1f} ms (baseline {baseline[key]:.1f} ms)")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
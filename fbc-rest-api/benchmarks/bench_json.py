@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# ============================================================================
+#  © 2025 Francisco Vivas Puerto (aka “DaFrancc”)
+#  All rights reserved. This file is part of the FoodBankConnect API.
+#  Use and distribution permitted with attribution to the author.
+# ============================================================================
+"""
+JSON serialization benchmark
+----------------------------
+Compares the stdlib provider (rows copied into dicts by _row_to_dict, then json.dumps)
+with the orjson provider, fed by _row_to_dict and by _rows_to_items, on:
+
+- a 50-row /v1/foodbanks list page
+- a 100-item /v1/search result set
+
+Usage: python benchmarks/bench_json.py [--number N] [--repeat R]
+No database is needed; rows are synthetic SQLAlchemy Rows shaped like the real tables.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData  # noqa: E402
+
+import app as api  # noqa: E402
+
+
+def _foodbank_rows(n: int):
+    """
+    Builds n Rows with every public foodbank column, including JSONB-shaped values.
+    """
+    keys = list(api.RESOURCE_COLUMNS["foodbanks"])
+    now = datetime.datetime(2025, 10, 1, 12, 0, tzinfo=datetime.timezone.utc)
+    tuples = []
+    for i in range(1, n + 1):
+        values = {
+            "id": str(i),
+            "name": f"Community Food Pantry #{i}",
+            "about": "Weekly grocery distribution, hot meals and SNAP enrollment help. " * 6,
+            "address": f"{100 + i} Main St",
+            "capacity": "1,200 meals/week",
+            "city": "Austin",
+            "state": "TX",
+            "eligibility": "Open to all",
+            "image": f"https://example.org/images/{i}.jpg",
+            "languages": ["English", "Spanish"],
+            "open_hours": {"mon": "9-5", "wed": "9-5", "sat": "10-2"},
+            "phone": "(512) 555-0100",
+            "services": ["groceries", "hot meals", "diapers"],
+            "urgency": "High",
+            "website": "https://example.org",
+            "zipcode": "78701",
+            "fetched_at": now,
+            "created_at": now,
+        }
+        tuples.append(tuple(values[k] for k in keys))
+    return IteratorResult(SimpleResultMetaData(keys), iter(tuples)).all()
+
+
+def _search_results(n: int):
+    """
+    Builds an n-item /v1/search result list.
+    """
+    return [
+        {
+            "model": ("foodbanks", "programs", "sponsors")[i % 3],
+            "id": str(i),
+            "name": f"Result {i}",
+            "snippet": "free groceries every Saturday morning at the community center " * 2,
+            "score": 1.0 / (i + 1),
+        }
+        for i in range(n)
+    ]
+
+
+def _bench(label: str, fn, number: int, repeat: int) -> float:
+    best = min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+    print(f"  {label:<44} {best * 1e6:9.1f} µs/response")
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if api.orjson is None:
+        print("orjson is not installed; nothing to compare.")
+        return 1
+
+    stdlib = api.StdlibJSONProvider(api.app)
+    fast = api.OrjsonJSONProvider(api.app)
+    rows = _foodbank_rows(50)
+    search = _search_results(100)
+
+    with api.app.app_context():
+        print("list page (50 foodbank rows)")
+        base = _bench(
+            "stdlib + _row_to_dict",
+            lambda: stdlib.response({"items": [api._row_to_dict(r) for r in rows], "request_id": "x"}),
+            args.number, args.repeat,
+        )
+        _bench(
+            "orjson + _row_to_dict",
+            lambda: fast.response({"items": [api._row_to_dict(r) for r in rows], "request_id": "x"}),
+            args.number, args.repeat,
+        )
+        new = _bench(
+            "orjson + _rows_to_items",
+            lambda: fast.response({"items": api._rows_to_items(rows), "request_id": "x"}),
+            args.number, args.repeat,
+        )
+        print(f"  speedup: {base / new:.1f}x")
+
+        print("search results (100 items)")
+        base = _bench("stdlib", lambda: stdlib.response({"items": search, "query": "food", "request_id": "x"}),
+                      args.number, args.repeat)
+        new = _bench("orjson", lambda: fast.response({"items": search, "query": "food", "request_id": "x"}),
+                     args.number, args.repeat)
+        print(f"  speedup: {base / new:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
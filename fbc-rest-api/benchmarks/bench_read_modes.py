@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# ============================================================================
+#  © 2025 Francisco Vivas Puerto (aka “DaFrancc”)
+#  All rights reserved. This file is part of the FoodBankConnect API.
+#  Use and distribution permitted with attribution to the author.
+# ============================================================================
+"""
+Read mode benchmark
+-------------------
+Compares READ_MODE=rows (rows fetched, mapped and encoded in Python) with
+READ_MODE=json_agg (Postgres builds the items array, Python splices it) for:
+
+- list pages of /v1/<resource> at the given page size
+- single-record reads of /v1/<resource>/<id>
+
+Both the Python CPU time (time.process_time) and the wall time per response are
+reported, since json_agg moves work from the Lambda into the database.
+
+Usage: python benchmarks/bench_read_modes.py [--resource R] [--size N] [--number N]
+Needs the same DATABASE_URL / DB_* environment as the API and a loaded table.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as api  # noqa: E402
+
+
+def _measure(fn, number: int):
+    """
+    Runs fn number times and returns (cpu seconds, wall seconds) per call.
+    """
+    fn()  # warm the connection pool and schema catalog
+    cpu, wall = time.process_time(), time.perf_counter()
+    for _ in range(number):
+        fn()
+    return (time.process_time() - cpu) / number, (time.perf_counter() - wall) / number
+
+
+def _report(label: str, mode: str, fn, number: int):
+    api.READ_MODE = mode
+    cpu, wall = _measure(fn, number)
+    print(f"  {label:<10} {mode:<9} cpu {cpu * 1e3:8.3f} ms   wall {wall * 1e3:8.3f} ms")
+    return cpu
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resource", default="foodbanks", choices=sorted(api.ALLOWED_TYPES))
+    parser.add_argument("--size", type=int, default=50)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    if not api.schema_catalog.has_table(args.resource):
+        print(f"{api._table_qualified(args.resource)} does not exist; run the loader first.")
+        return 1
+
+    with api.app.test_request_context("/"):
+        api.READ_MODE = "rows"
+        items, _, _ = api.fetch_list(args.resource, None, args.size, {}, [], None)
+        if not items:
+            print("table is empty; nothing to compare.")
+            return 1
+        item_id = items[0]["id"]
+
+        def list_page():
+            items, next_start, has_more = api.fetch_list(args.resource, None, args.size, {}, [], None)
+            api.app.json.response({"items": items, "has_more": has_more, "next_start": next_start, "request_id": "x"})
+
+        def detail():
+            api.app.json.response(api.fetch_one(args.resource, item_id))
+
+        print(f"{args.resource}, page size {args.size}, {args.number} calls, provider {type(api.app.json).__name__}")
+        for label, fn in (("list", list_page), ("detail", detail)):
+            base = _report(label, "rows", fn, args.number)
+            new = _report(label, "json_agg", fn, args.number)
+            print(f"  {label} python cpu reduction: {base / new:.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
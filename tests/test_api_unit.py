@@ -2,7 +2,14 @@
 # © 2025 Francisco Vivas. All rights reserved.
 
 import os
+import sys
+import gzip
+import json
+import time
+import base64
+import threading
 import importlib
+from types import SimpleNamespace
 import pytest
 
 # ----- Helpers ---------------------------------------------------------------
@@ -90,3 +97,649 @@ def test_get_by_id(app_client, path, item_id):
     data = r.get_json()
     assert isinstance(data, dict)
     assert data.get("id") == item_id
+
+
+# ----- API module (fbc-rest-api/app.py; no database needed) ------------------
+
+API_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fbc-rest-api")
+
+@pytest.fixture(scope="module")
+def api():
+    if API_DIR not in sys.path:
+        sys.path.insert(0, API_DIR)
+    import app  # noqa: E402
+    return app
+
+def _http_api_event(path, headers=None):
+    # Minimal API Gateway HTTP API (v2) event
+    return {
+        "version": "2.0",
+        "rawPath": path,
+        "headers": headers or {},
+        "requestContext": {"http": {"method": "GET", "sourceIp": "127.0.0.1"}},
+    }
+
+# ----- Lambda entrypoint -----------------------------------------------------
+
+def test_lambda_gzip_body_is_base64(api):
+    result = api.lambda_handler(_http_api_event("/v1/docs", {"accept-encoding": "gzip"}), None)
+    assert int(result["statusCode"]) == 200
+    assert result["headers"]["Content-Encoding"] == "gzip"
+    assert result["isBase64Encoded"] is True
+    docs = json.loads(gzip.decompress(base64.b64decode(result["body"])))
+    assert "/v1/foodbanks" in docs["endpoints"]
+
+def test_lambda_plain_body_round_trips(api):
+    result = api.lambda_handler(_http_api_event("/v1/docs"), None)
+    assert "Content-Encoding" not in result["headers"]
+    body = base64.b64decode(result["body"]) if result["isBase64Encoded"] else result["body"]
+    assert "endpoints" in json.loads(body)
+
+def test_lambda_logs_synchronously_by_default(api):
+    import subprocess
+    env = {**os.environ, "AWS_LAMBDA_FUNCTION_NAME": "fbc-api"}
+    env.pop("LOG_ASYNC", None)
+    out = subprocess.run([sys.executable, "-c", "import app, threading; print(app.LOG_ASYNC, threading.active_count())"],
+                         cwd=API_DIR, env=env, capture_output=True, text=True, check=True).stdout
+    assert out.split() == ["False", "1"]  # no QueueListener thread
+
+def test_sync_log_lines_carry_the_request_id(api):
+    import logging
+    record = logging.LogRecord("fbc.api", logging.INFO, __file__, 0, "x", None, None)
+    with api.app.test_request_context("/"):
+        api.g.request_id = "abc"
+        assert api._stamp_request_id(record) is True
+    assert record.request_id == "abc"
+
+# ----- Keyset cursors --------------------------------------------------------
+
+def _sql(api, stmt):
+    # Generic SQL with :name placeholders, schema prefix dropped
+    return " ".join(str(stmt.compile()).replace(f"{api.SCHEMA}.", "").split())
+
+def test_cursor_round_trip(api):
+    keys = api._order_keys("foodbanks", ["-urgency", "name"])
+    token = api._encode_cursor(keys, ["High", None, 7, "7"])
+    assert api._decode_cursor(token, keys) == ["High", None, 7, "7"]
+
+def test_cursor_rejects_other_sort(api):
+    token = api._encode_cursor(api._order_keys("foodbanks", ["name"]), ["a", 1, "1"])
+    with pytest.raises(ValueError, match="does not match"):
+        api._decode_cursor(token, api._order_keys("foodbanks", ["-name"]))
+
+def test_cursor_rejects_tampered_signature(api):
+    keys = api._order_keys("foodbanks", ["name"])
+    body = {"s": ["urgency DESC", "id_num ASC", "id ASC"], "v": ["a", 1, "1"]}
+    token = base64.urlsafe_b64encode(json.dumps(body).encode()).decode().rstrip("=")
+    with pytest.raises(ValueError, match="does not match"):
+        api._decode_cursor(token, keys)
+
+@pytest.mark.parametrize("token", ["not-a-cursor", "e30", base64.urlsafe_b64encode(b'{"s": 1}').decode()])
+def test_cursor_rejects_malformed(api, token):
+    with pytest.raises(ValueError):
+        api._decode_cursor(token, api._order_keys("foodbanks", []))
+
+def test_sort_ends_with_total_tiebreaker(api):
+    assert api._order_keys("foodbanks", ["-name"]) == (("name", "DESC"), ("id_num", "ASC"), ("id", "ASC"))
+    assert api._order_keys("foodbanks", ["name", "-id", "city"]) == (("name", "ASC"), ("id_num", "DESC"), ("id", "DESC"))
+
+def test_keyset_predicate(api):
+    keys = api._order_keys("foodbanks", ["name"])
+    sql = _sql(api, api._keyset_condition("foodbanks", keys, (False,)))
+    assert "foodbanks.name > :k0 OR foodbanks.name IS NULL" in sql
+    assert "foodbanks.name = :k0 AND (foodbanks.id_num, foodbanks.id) > (:k1, :k2)" in sql
+
+def test_keyset_predicate_default_sort_is_a_row_value_seek(api):
+    keys = api._order_keys("foodbanks", [])
+    values = api._cursor_values(keys, SimpleNamespace(_mapping={"id": "fb_ut"}))
+    assert values == [api.NON_NUMERIC_ID_NUM, "fb_ut"]
+    seek, params = api._bind_seek(keys, api._encode_cursor(keys, values))
+    assert params == {"k0": api.NON_NUMERIC_ID_NUM, "k1": "fb_ut"}
+    assert _sql(api, api._keyset_condition("foodbanks", keys, seek)) == "(foodbanks.id_num, foodbanks.id) > (:k0, :k1)"
+    desc = api._order_keys("foodbanks", ["-id"])
+    assert _sql(api, api._keyset_condition("foodbanks", desc, ())) == "(foodbanks.id_num, foodbanks.id) < (:k0, :k1)"
+
+def test_cursor_rejects_null_tiebreak(api):
+    keys = api._order_keys("foodbanks", [])
+    with pytest.raises(ValueError, match="not a valid pagination cursor"):
+        api._bind_seek(keys, api._encode_cursor(keys, [None, "fb_ut"]))
+
+def test_numeric_start_only_with_default_sort(api):
+    assert api._bind_seek(api._order_keys("foodbanks", ["id"]), "5") == ("id", {"k0": 5})
+    with pytest.raises(ValueError, match="must be a pagination cursor"):
+        api._bind_seek(api._order_keys("foodbanks", ["name"]), "5")
+    with pytest.raises(ValueError, match="must be a pagination cursor"):
+        api._bind_seek(api._order_keys("foodbanks", ["-id"]), "5")
+
+def test_numeric_start_range_checked(api):
+    keys = api._order_keys("foodbanks", [])
+    assert api._bind_seek(keys, "000" + "9" * 18) == ("id", {"k0": int("9" * 18)})
+    with pytest.raises(ValueError, match="out of range"):
+        api._bind_seek(keys, "9" * 19)
+
+@pytest.fixture
+def sqlite_foodbanks(api, monkeypatch):
+    # The list query on SQLite (schema attached under the API's name), so paging runs for real
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.pool import StaticPool
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def _attach(dbapi_conn, _record):
+        dbapi_conn.execute(f"ATTACH DATABASE ':memory:' AS {api.SCHEMA}")
+
+    ids = ["3", "1", "fb_ut", "10", "2", "alpha", "pr_9", "20"]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"CREATE TABLE {api.SCHEMA}.foodbanks (id TEXT PRIMARY KEY, id_num INTEGER, name TEXT, city TEXT)")
+        for i, item_id in enumerate(ids):
+            conn.exec_driver_sql(f"INSERT INTO {api.SCHEMA}.foodbanks VALUES (?, ?, ?, ?)",
+                                 (item_id, api._id_num(item_id), [None, "A", "B"][i % 3], "Austin"))
+    monkeypatch.setattr(api, "get_engine", lambda: engine)
+    monkeypatch.setattr(api, "READ_MODE", "rows")
+    monkeypatch.setattr(api.schema_catalog, "_columns",
+                        {"foodbanks": ["id", "id_num", "name", "city"], "programs": [], "sponsors": []})
+    monkeypatch.setattr(api.schema_catalog, "_loaded_at", time.monotonic())
+    return ids
+
+@pytest.mark.parametrize("sort", [[], ["name"], ["-name"], ["-city", "name"]])
+def test_paging_visits_every_row_once(api, sqlite_foodbanks, sort):
+    seen, start = [], None
+    while True:
+        items, start, has_more = api.fetch_list("foodbanks", start, 3, {}, sort)
+        seen += [item["id"] for item in items]
+        if not has_more:
+            break
+    assert sorted(seen) == sorted(sqlite_foodbanks)
+
+def test_default_order_numeric_then_text(api, sqlite_foodbanks):
+    items, _, _ = api.fetch_list("foodbanks", None, 50, {}, [])
+    assert [item["id"] for item in items] == ["1", "2", "3", "10", "20", "alpha", "fb_ut", "pr_9"]
+
+# ----- Response cache --------------------------------------------------------
+
+def test_response_cache_evicts_least_recently_used(api):
+    cache = api.ResponseCache(max_entries=2, ttl=60, negative_ttl=60)
+    cache.set(("a",), 1)
+    cache.set(("b",), 2)
+    assert cache.get(("a",)) == (True, 1)  # a is now the most recent
+    cache.set(("c",), 3)
+    assert cache.get(("b",)) == (False, None)
+    assert cache.get(("a",)) == (True, 1) and cache.get(("c",)) == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+def test_response_cache_ttl_and_negative_ttl(api):
+    cache = api.ResponseCache(max_entries=8, ttl=60, negative_ttl=0.05)
+    cache.set(("item", "404"), None)
+    cache.set(("item", "1"), {"id": "1"})
+    assert cache.get(("item", "404")) == (True, None)
+    time.sleep(0.06)
+    assert cache.get(("item", "404")) == (False, None)
+    assert cache.get(("item", "1")) == (True, {"id": "1"})
+    stats = cache.stats()
+    assert stats["negative_hits"] == 1 and stats["expirations"] == 1
+
+def test_response_cache_zero_ttl_stores_nothing(api):
+    cache = api.ResponseCache(max_entries=8, ttl=0, negative_ttl=0)
+    cache.set(("a",), 1)
+    assert cache.get(("a",)) == (False, None)
+
+def test_data_version_change_clears_response_cache(api, monkeypatch):
+    versions = iter([1, 1, 2])
+
+    class _Conn:
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            return False
+        def execute(self, sql):
+            return self
+        def first(self):
+            return SimpleNamespace(version=next(versions), loaded_at=None)
+
+    cache = api.ResponseCache(max_entries=8, ttl=60, negative_ttl=60)
+    monkeypatch.setattr(api, "response_cache", cache)
+    monkeypatch.setattr(api, "get_engine", lambda: SimpleNamespace(connect=_Conn))
+    monkeypatch.setattr(api, "CACHE_VERSION_CHECK_SECS", 0)
+    monkeypatch.setattr(api, "_data_version_state", {"version": None, "loaded_at": None, "checked_at": None})
+
+    key = api._cache_key("list", "foodbanks", filters={"city": "Austin"})
+    assert key[0] == 1
+    cache.set(key, {"items": []})
+    assert api._data_version() == 1 and cache.get(key)[0]
+    assert api._data_version() == 2
+    assert cache.get(key) == (False, None)
+
+# ----- Shared (L2) cache -----------------------------------------------------
+
+def _shared(api, **kwargs):
+    options = {"ttl": 60, "negative_ttl": 60, "lock_ttl": 5, "wait": 1}
+    options.update(kwargs)
+    return api.SharedCache(api.MemoryRedis(), **options)
+
+def test_shared_cache_computes_once_then_hits(api):
+    cache, calls = _shared(api), []
+    key = (1, "list", "foodbanks", ("size", 25))
+    compute = lambda: calls.append(1) or {"items": [1]}
+    assert cache.get_or_compute(key, compute) == {"items": [1]}
+    assert cache.get_or_compute(key, compute) == {"items": [1]}
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_shared_cache_coalesces_with_lock_holder(api):
+    # Another instance holds the recompute lock and publishes its value shortly after
+    cache = _shared(api)
+    key = (1, "item", "foodbanks", ("id", "7"))
+    name = cache._name(key)
+    cache.client.set(f"{name}:lock", "other-instance", nx=True, px=5000)
+    publisher = threading.Timer(0.1, lambda: cache._store(name, {"id": "7"}))
+    publisher.start()
+    try:
+        value = cache.get_or_compute(key, lambda: pytest.fail("waiter must not recompute"))
+    finally:
+        publisher.join()
+    assert value == {"id": "7"}
+    assert cache.stats()["coalesced"] == 1
+
+def test_shared_cache_computes_locally_when_lock_holder_is_slow(api):
+    cache = _shared(api, wait=0.05)
+    key = (1, "item", "foodbanks", ("id", "8"))
+    cache.client.set(f"{cache._name(key)}:lock", "other-instance", nx=True, px=5000)
+    assert cache.get_or_compute(key, lambda: {"id": "8"}) == {"id": "8"}
+
+def test_shared_cache_negative_entries(api):
+    cache, calls = _shared(api), []
+    key = (1, "item", "foodbanks", ("id", "missing"))
+    compute = lambda: calls.append(1)  # None: not found
+    assert cache.get_or_compute(key, compute) is None
+    assert cache.get_or_compute(key, compute) is None
+    assert len(calls) == 1
+
+def test_shared_cache_negative_ttl_zero_is_not_stored(api):
+    cache, calls = _shared(api, negative_ttl=0), []
+    key = (1, "item", "foodbanks", ("id", "missing"))
+    cache.get_or_compute(key, lambda: calls.append(1))
+    cache.get_or_compute(key, lambda: calls.append(1))
+    assert len(calls) == 2
+
+def test_shared_cache_keys_are_namespaced_by_data_version(api):
+    cache = _shared(api)
+    assert cache._name((1, "list", "foodbanks", ("size", 25))) != cache._name((2, "list", "foodbanks", ("size", 25)))
+    assert cache._name((1, "list", "foodbanks", ("size", 25))).startswith("fbc:v1:list:foodbanks:")
+
+# ----- Sparse fieldsets ------------------------------------------------------
+
+def test_resolve_fields_defaults_to_full_record(api):
+    assert api._resolve_fields("foodbanks", None, None) is None
+
+def test_resolve_fields_keeps_model_order_and_id(api):
+    assert api._resolve_fields("foodbanks", "city,name", None) == ["id", "name", "city"]
+
+def test_resolve_fields_preset(api):
+    assert api._resolve_fields("programs", "card", None) == list(api.FIELD_PRESETS["card"]["programs"])
+
+def test_resolve_fields_exclude(api):
+    fields = api._resolve_fields("foodbanks", None, "about,open_hours,id")
+    assert "about" not in fields and "open_hours" not in fields
+    assert fields[0] == "id" and len(fields) == len(api.RESOURCE_COLUMNS["foodbanks"]) - 2
+
+def test_resolve_fields_fields_and_exclude(api):
+    assert api._resolve_fields("foodbanks", "card", "zipcode,state") == ["id", "name", "city", "eligibility", "urgency"]
+
+@pytest.mark.parametrize("fields,exclude", [("name,nope", None), (None, "bogus"), ("search_doc", None)])
+def test_resolve_fields_rejects_unknown(api, fields, exclude):
+    with pytest.raises(ValueError, match="Unknown field"):
+        api._resolve_fields("foodbanks", fields, exclude)
+
+# ----- Multi-get ids ---------------------------------------------------------
+
+def test_parse_ids_string_and_list(api):
+    assert api._parse_ids(" 3, 1,3,,fb_ut ") == ["3", "1", "fb_ut"]
+    assert api._parse_ids([3, "1", " 3 ", "1"]) == ["3", "1"]
+
+def test_parse_ids_names_invalid_entries(api):
+    with pytest.raises(ValueError, match=r"invalid entries: \[1\] true, \[2\] null, \[4\] 1\.5\.$"):
+        api._parse_ids([3, True, None, "1", 1.5])
+
+@pytest.mark.parametrize("raw", ["", " , ", [], [" "], {"ids": "1"}, 5])
+def test_parse_ids_rejects_empty_or_wrong_type(api, raw):
+    with pytest.raises(ValueError):
+        api._parse_ids(raw)
+
+def test_parse_ids_limit(api):
+    assert len(api._parse_ids([str(i) for i in range(api.MAX_BATCH_SIZE)])) == api.MAX_BATCH_SIZE
+    with pytest.raises(ValueError, match="maximum per batch"):
+        api._parse_ids(",".join(str(i) for i in range(api.MAX_BATCH_SIZE + 1)))
+
+@pytest.mark.parametrize("body,message", [
+    ({"ids": ["1"], "fields": ["id", "name"]}, '"fields" must be a comma-separated string.'),
+    ({"ids": ["1"], "exclude": 5}, '"exclude" must be a comma-separated string.'),
+])
+def test_batch_rejects_non_string_fieldsets(api, body, message):
+    r = api.app.test_client().post("/v1/foodbanks/batch", json=body)
+    assert r.status_code == 400
+    assert r.get_json()["message"] == message
+
+# ----- HTTP caching ----------------------------------------------------------
+
+def test_etag_and_conditional_get(api):
+    client = api.app.test_client()
+    first = client.get("/v1/docs")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and etag
+    assert client.get("/v1/docs").headers["ETag"] == etag  # request ids are not part of the tag
+    again = client.get("/v1/docs", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.data == b""
+    assert client.get("/v1/docs", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+def test_etag_differs_per_content_encoding(api):
+    client = api.app.test_client()
+    plain = client.get("/v1/docs").headers["ETag"]
+    gzipped = client.get("/v1/docs", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] != plain and gzipped.headers["ETag"].endswith('-gzip"')
+
+def test_etag_leaves_out_the_request_id_and_last_modified_without_cache(api, monkeypatch):
+    import datetime
+    loaded_at = datetime.datetime(2026, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    reads = []
+    def data_version():
+        reads.append(1)
+        api._data_version_state.update(version=7, loaded_at=loaded_at)
+        return 7
+    for key in ("version", "loaded_at"):
+        monkeypatch.setitem(api._data_version_state, key, None)
+    monkeypatch.setattr(api, "CACHE_ENABLED", False)
+    monkeypatch.setattr(api, "_data_version", data_version)
+    monkeypatch.setattr(api, "_run_search", lambda q: [{"model": "foodbanks", "id": "1", "name": q}])
+    client = api.app.test_client()
+    first, second = client.get("/v1/search?q=rice"), client.get("/v1/search?q=rice")
+    assert first.get_json()["request_id"] != second.get_json()["request_id"]
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert first.headers["ETag"] != client.get("/v1/search?q=beans").headers["ETag"]
+    assert first.headers["Last-Modified"] == "Fri, 02 Jan 2026 03:04:05 GMT" and reads
+
+# ----- Connection pool -------------------------------------------------------
+
+def test_pool_modes(api, monkeypatch):
+    monkeypatch.setattr(api, "DB_POOL_MODE", "queue")
+    queue = api._engine_options()
+    assert queue["poolclass"] is api.TimedQueuePool and queue["pool_pre_ping"] is api.DB_POOL_PRE_PING
+    assert "connect_args" not in queue
+    monkeypatch.setattr(api, "DB_POOL_MODE", "keepalive")
+    keepalive = api._engine_options()
+    assert keepalive["pool_pre_ping"] is False and keepalive["connect_args"]["keepalives"] == 1
+    monkeypatch.setattr(api, "DB_POOL_MODE", "null")
+    assert api._engine_options() == {"poolclass": api.TimedNullPool}
+    monkeypatch.setattr(api, "DB_POOL_MODE", "lambda")
+    with pytest.raises(ValueError, match="unknown DB_POOL_MODE"):
+        api._engine_options()
+
+def test_pool_telemetry_times_checkouts(api, monkeypatch):
+    from sqlalchemy import create_engine
+    telemetry = api.PoolTelemetry()
+    monkeypatch.setattr(api, "pool_telemetry", telemetry)
+    engine = create_engine("sqlite://", poolclass=api.TimedQueuePool, pool_size=1, max_overflow=0)
+    for _ in range(2):
+        with engine.connect():
+            pass
+    stats = telemetry.stats(engine.pool)
+    assert stats["checkouts"] == 2 and stats["size"] == 1 and stats["checked_out"] == 0
+    engine.dispose()
+
+def test_liveness_ping_only_after_idle(api, monkeypatch):
+    telemetry = api.PoolTelemetry()
+    monkeypatch.setattr(api, "pool_telemetry", telemetry)
+    def broken_cursor():
+        raise OSError("server closed the connection")
+    dead = SimpleNamespace(cursor=broken_cursor)
+    record = SimpleNamespace(info={"checked_in_at": time.monotonic()})
+    api._on_checkout_liveness(dead, record, None)  # recently used: no ping
+    assert telemetry.liveness_checks == 0
+    record.info["checked_in_at"] -= api.DB_LIVENESS_IDLE_SECS + 1
+    with pytest.raises(api.DisconnectionError):
+        api._on_checkout_liveness(dead, record, None)
+    assert (telemetry.liveness_checks, telemetry.liveness_failures) == (1, 1)
+
+@pytest.mark.parametrize("mode, pgbouncer, raw, expected", [
+    ("queue", False, "5", 5),
+    ("queue", False, " None ", None),
+    ("queue", True, "5", None),
+    ("null", False, "5", None),
+])
+def test_prepare_threshold(api, monkeypatch, mode, pgbouncer, raw, expected):
+    monkeypatch.setattr(api, "DB_POOL_MODE", mode)
+    monkeypatch.setattr(api, "DB_PGBOUNCER", pgbouncer)
+    monkeypatch.setattr(api, "DB_PREPARE_THRESHOLD", raw)
+    assert api._prepare_threshold() == expected
+
+def test_on_connect_applies_prepare_settings(api, monkeypatch):
+    monkeypatch.setattr(api, "DB_POOL_MODE", "queue")
+    monkeypatch.setattr(api, "DB_PGBOUNCER", False)
+    monkeypatch.setattr(api, "DB_PREPARE_THRESHOLD", "3")
+    monkeypatch.setattr(api, "pool_telemetry", api.PoolTelemetry())
+    psycopg_conn = SimpleNamespace(prepare_threshold=5, prepared_max=100)
+    api._on_connect(SimpleNamespace(driver_connection=psycopg_conn), None)
+    assert (psycopg_conn.prepare_threshold, psycopg_conn.prepared_max) == (3, api.DB_PREPARED_MAX)
+    assert api.pool_telemetry.connects == 1
+    monkeypatch.setattr(api, "_engine", None)
+    assert api.prepared_stats() == {"threshold": 3, "max_per_connection": api.DB_PREPARED_MAX, "pgbouncer": False}
+
+# ----- Metrics ---------------------------------------------------------------
+
+def test_metrics_text_format(api):
+    registry = api.MetricsRegistry()
+    hits = registry.counter("t_hits_total", "Hits.", ("route",))
+    latency = registry.histogram("t_seconds", "Latency.", buckets=(0.1, 1.0))
+    hits.inc('/v1/"x"')
+    hits.inc('/v1/"x"', amount=2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    lines = registry.render().splitlines()
+    assert lines[:3] == ["# HELP t_hits_total Hits.", "# TYPE t_hits_total counter", 't_hits_total{route="/v1/\\"x\\""} 3.0']
+    assert 't_seconds_bucket{le="0.1"} 1.0' in lines and 't_seconds_bucket{le="1.0"} 2.0' in lines
+    assert 't_seconds_bucket{le="+Inf"} 2.0' in lines and "t_seconds_count 2.0" in lines and "t_seconds_sum 0.55" in lines
+
+def test_metrics_endpoint_labels_by_route(api, monkeypatch):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", None)
+    client = api.app.test_client()
+    client.get("/v1/docs")
+    client.get("/v1/nope")
+    client.get("/nope")
+    body = client.get("/metrics").get_data(as_text=True)
+    assert 'fbc_http_request_duration_seconds_count{route="/v1/docs",resource="",method="GET",status="200"}' in body
+    assert '{route="/v1/<resource>",resource="other",method="GET",status="404"}' in body  # no per-path series
+    assert 'route="unmatched"' in body and "fbc_db_pool_connects_total" in body
+
+def test_metrics_endpoint_requires_admin_token(api, monkeypatch):
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "s3cret")
+    client = api.app.test_client()
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+def test_metrics_push_is_rate_limited(api, monkeypatch):
+    import urllib.request
+    pushed = []
+    monkeypatch.setattr(urllib.request, "urlopen", lambda req, timeout: pushed.append(req) or SimpleNamespace(close=lambda: None))
+    monkeypatch.setattr(api, "METRICS_PUSH_URL", "http://gateway:9091/")
+    monkeypatch.setitem(api._push_state, "last", 0.0)
+    api._maybe_push_metrics()
+    api._maybe_push_metrics()  # within METRICS_PUSH_INTERVAL_SECS
+    assert len(pushed) == 1 and pushed[0].get_method() == "PUT"
+    assert pushed[0].full_url.startswith("http://gateway:9091/metrics/job/fbc-api/instance/")
+    assert b"# TYPE fbc_http_request_duration_seconds histogram" in pushed[0].data
+
+# ----- Search ----------------------------------------------------------------
+
+class _FakeEngine:
+    # Answers each statement through respond(sql, params); records what ran
+    def __init__(self, respond):
+        self.respond, self.executed = respond, []
+
+    def connect(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt, params=None):
+        sql = " ".join(str(stmt).split())
+        self.executed.append((sql, params))
+        return _FakeResult(self.respond(sql, params))
+
+    def rollback(self):
+        pass
+
+class _FakeResult(list):
+    def fetchall(self):
+        return list(self)
+
+    def scalar(self):
+        return self[0][0] if self else None
+
+    def scalar_one(self):
+        return self[0][0]
+
+    def one(self):
+        return self[0]
+
+def test_search_sql_ranks_matches_before_headline(api):
+    sql = " ".join(api._search_sql("foodbanks").split())
+    hits, outer = sql.split("SELECT hits.id")
+    assert "websearch_to_tsquery('english', :q)" in hits
+    assert "WHERE t.search_doc @@ q.query ORDER BY score DESC, t.id_num, t.id LIMIT :limit" in hits
+    assert "ts_rank_cd(t.search_doc, q.query, 32)" in hits and "ts_headline" not in hits
+    assert "ts_headline('english', hits.document" in outer
+
+def test_search_filter_uses_the_tsvector(api):
+    (cond,) = api._filter_conditions("programs", ("search",))
+    assert _sql(api, cond) == "programs.search_doc @@ websearch_to_tsquery('english', :f_search)"
+
+def test_whitespace_search_is_skipped(api):
+    assert api._bind_filters("foodbanks", {"search": "  \t ", "city": " Austin "}) == (("city",), {"f_city": "Austin"})
+
+def test_run_search_merges_rankings_across_models(api, monkeypatch):
+    scores = {"foodbanks": [0.2, 0.9], "programs": [0.5], "sponsors": [0.7]}
+    def respond(sql, params):
+        model = next(m for m in scores if f".{m} AS t" in sql)
+        return [SimpleNamespace(id=f"{model}-{s}", name=None, snippet=" a\n b ", score=s) for s in scores[model]]
+    engine = _FakeEngine(respond)
+    monkeypatch.setattr(api, "get_engine", lambda: engine)
+    monkeypatch.setattr(api, "SEARCH_RESULT_LIMIT", 3)
+    results = api._run_search("food")
+    assert [r["id"] for r in results] == ["foodbanks-0.9", "sponsors-0.7", "programs-0.5"]
+    assert results[0] == {"model": "foodbanks", "id": "foodbanks-0.9", "name": "(Unnamed)", "snippet": "a b", "score": 0.9}
+    assert all(params == {"q": "food", "limit": 3} for _, params in engine.executed)
+
+# ----- json_agg read mode ----------------------------------------------------
+
+def test_json_agg_formats_timestamps_as_http_dates(api, monkeypatch):
+    monkeypatch.setattr(api.schema_catalog, "_columns",
+                        {r: list(cols) for r, cols in api.RESOURCE_COLUMNS.items()})
+    monkeypatch.setattr(api.schema_catalog, "_loaded_at", time.monotonic())
+    http_date = "to_char(timezone('UTC', created_at), 'Dy, DD Mon YYYY HH24:MI:SS \"GMT\"')"
+    assert api._json_object_sql("foodbanks", ["id", "created_at"]) == f"json_build_object('id', id, 'created_at', {http_date})"
+    page = SimpleNamespace(items="[]", fetched=0, last_keys=None)
+    engine = _FakeEngine(lambda sql, params: [page])
+    monkeypatch.setattr(api, "get_engine", lambda: engine)
+    assert api._fetch_list_json("foodbanks", 10, {}, [], None, ["id", "created_at"]) == ("[]", None, False)
+    assert http_date.replace("created_at", "foodbanks.created_at") in engine.executed[0][0].replace(f"{api.SCHEMA}.", "")
+
+# ----- Facets ----------------------------------------------------------------
+
+def test_unfiltered_facets_read_the_precomputed_table(api, monkeypatch):
+    rows = [("city", "Austin", 9), ("city", "Dallas", 4), ("city", "Waco", 1), ("urgency", "High", 2)]
+    engine = _FakeEngine(lambda sql, params: rows)
+    monkeypatch.setattr(api, "get_engine", lambda: engine)
+    monkeypatch.setattr(api, "FACET_LIMIT", 2)
+    assert api.fetch_facets("foodbanks", ["city", "urgency"], {"state": "all"}) == {
+        "city": {"Austin": 9, "Dallas": 4}, "urgency": {"High": 2}}
+    sql = engine.executed[0][0].replace(f"{api.SCHEMA}.", "")
+    assert len(engine.executed) == 1 and "FROM facet_counts" in sql
+    assert "ORDER BY facet_counts.field, facet_counts.count DESC, facet_counts.value" in sql
+
+def test_filtered_facets_ignore_their_own_filter(api, monkeypatch):
+    engine = _FakeEngine(lambda sql, params: [("city", "Austin", 3), ("urgency", "High", 1)])
+    monkeypatch.setattr(api, "get_engine", lambda: engine)
+    facets = api.fetch_facets("foodbanks", ["city", "urgency"], {"city": "Austin", "urgency": "High"})
+    assert facets == {"city": {"Austin": 3}, "urgency": {"High": 1}}
+    (sql, params), = engine.executed
+    assert "facet_counts" not in sql and params == {"f_city": "Austin", "f_urgency": "High"}
+    city, urgency = sql.replace(f"{api.SCHEMA}.", "").split(" UNION ALL ")
+    assert "foodbanks.urgency = :f_urgency" in city and ":f_city" not in city
+    assert "foodbanks.city = :f_city" in urgency and ":f_urgency" not in urgency
+    assert "GROUP BY foodbanks.city ORDER BY count(*) DESC, foodbanks.city LIMIT" in city
+
+def test_facet_sources(api):
+    value, _ = api._facet_source("foodbanks", "zipcode")
+    assert _sql(api, value) == "left(foodbanks.zipcode_norm, 5)"
+    from sqlalchemy import select
+    value, source = api._facet_source("foodbanks", "languages")
+    sql = _sql(api, select(value).select_from(source))
+    assert sql.startswith("SELECT facet.value FROM foodbanks JOIN LATERAL jsonb_array_elements_text(")
+
+def test_facet_fields_validated(api):
+    assert api._resolve_facet_fields("programs", None) == ["eligibility", "program_type"]
+    assert api._resolve_facet_fields("foodbanks", " urgency,city,urgency ") == ["urgency", "city"]
+    with pytest.raises(ValueError, match="Unknown facet"):
+        api._resolve_facet_fields("sponsors", "name")
+
+# ----- Totals ----------------------------------------------------------------
+
+def test_exact_count_is_capped(api, sqlite_foodbanks, monkeypatch):
+    assert api.count_rows("foodbanks", {"name": "A"}, "exact") == {"count": 3, "accuracy": "exact"}
+    monkeypatch.setattr(api, "COUNT_EXACT_CAP", 5)
+    assert api.count_rows("foodbanks", {}, "exact") == {"count": 5, "accuracy": "lower_bound"}
+
+def test_estimated_count(api, monkeypatch):
+    def respond(sql, params):
+        if "pg_class" in sql:
+            return [(1234,)]
+        return [([{"Plan": {"Plan Rows": 17}}],)]
+    engine = _FakeEngine(respond)
+    monkeypatch.setattr(api, "get_engine", lambda: engine)
+    assert api.count_rows("foodbanks", {}, "estimate") == {"count": 1234, "accuracy": "estimate"}
+    assert api.count_rows("foodbanks", {"city": "Austin"}, "estimate") == {"count": 17, "accuracy": "estimate"}
+    sql, params = engine.executed[-1]
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT 1") and params == {"f_city": "Austin"}
+
+def test_unknown_count_mode_is_rejected(api):
+    r = api.app.test_client().get("/v1/foodbanks?count=all")
+    assert r.status_code == 400 and r.get_json()["details"] == {"count": "all"}
+
+# ----- Query builder validation ----------------------------------------------
+
+def test_builder_rejects_unknown_filter(api):
+    with pytest.raises(ValueError, match="Unknown filter field"):
+        api.build_list_query("foodbanks", 10, {"city; DROP TABLE x": "a"}, [], None, None)
+
+def test_builder_rejects_unknown_sort(api):
+    with pytest.raises(ValueError, match="Invalid sort field"):
+        api.build_list_query("programs", 10, {}, ["-location"], None, None)
+
+def test_builder_binds_values(api, monkeypatch):
+    monkeypatch.setattr(api.schema_catalog, "_columns",
+                        {r: list(cols) for r, cols in api.RESOURCE_COLUMNS.items()})
+    monkeypatch.setattr(api.schema_catalog, "_loaded_at", time.monotonic())
+    stmt, params, _ = api.build_list_query("foodbanks", 10, {"name": "50%' OR 1=1"}, [], None, ["id"])
+    assert "1=1" not in _sql(api, stmt) and "LIKE lower(:f_name)" in _sql(api, stmt)
+    assert params == {"f_name": "%50\\%' OR 1=1%", "n": 11}
+    again, _, _ = api.build_list_query("foodbanks", 10, {"name": "other"}, [], None, ["id"])
+    assert again is stmt  # one statement per shape
+
+@pytest.mark.parametrize("path", [
+    "/v1/foodbanks?bogus=1",
+    "/v1/foodbanks?sort=-nope",
+    "/v1/programs?sort=-name,location",
+    "/v1/foodbanks/export?bogus=1",
+    "/v1/foodbanks/facets?bogus=1",
+])
+def test_unknown_fields_rejected_before_io(api, monkeypatch, path):
+    connects = []
+    monkeypatch.setattr(api, "get_engine", lambda: connects.append(1) or pytest.fail("no I/O expected"))
+    r = api.app.test_client().get(path)
+    assert r.status_code == 400
+    assert r.get_json()["error"] == "BadRequest"
+    assert connects == []